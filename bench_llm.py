@@ -0,0 +1,168 @@
+# bench_llm.py
+# CPU benchmarks for llm.py training, on a tiny randomly initialised T5 and a
+# synthetic corpus so they run offline in a few minutes.
+#
+# Usage:
+#   python bench_llm.py ddp --nprocs 1 2 4 8 --threads 1
+#   python bench_llm.py checkpoint --save_steps 5
+#
+# Every benchmark prints a JSON report so runs can be compared between commits.
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+_WORDS = (
+    "team launch review schedule backend api schema design deploy release customer "
+    "feedback metrics dashboard budget quarter roadmap hiring security audit testing "
+    "migration database latency incident retro planning sprint demo onboarding"
+).split()
+
+
+def write_corpus(path: str, n: int, seed: int = 0) -> str:
+    """JSONL of n {"transcript", "summary"} pairs, transcripts 40-400 words."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(n):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(40, 400))]
+            f.write(json.dumps({"transcript": " ".join(words), "summary": " ".join(words[: rng.randint(8, 30)])}) + "\n")
+    return path
+
+
+def build_tiny_t5(path: str, corpus: str, vocab_size: int = 1000, seed: int = 0) -> str:
+    """2-layer T5 with a BPE tokenizer trained on corpus, saved to path. Reused if present."""
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+    from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    with open(corpus, encoding="utf-8") as f:
+        texts = [json.loads(line)["transcript"] for line in f]
+    tok.train_from_iterator(texts, trainers.BpeTrainer(vocab_size=vocab_size, special_tokens=["<pad>", "</s>", "<unk>"]))
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tok, pad_token="<pad>", eos_token="</s>", unk_token="<unk>", model_max_length=512)
+
+    torch.manual_seed(seed)
+    config = T5Config(
+        vocab_size=len(tokenizer),
+        d_model=128,
+        d_kv=32,
+        d_ff=256,
+        num_layers=2,
+        num_decoder_layers=2,
+        num_heads=4,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.pad_token_id,
+    )
+    T5ForConditionalGeneration(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def _run_llm(nprocs: int, extra: List[str]) -> str:
+    cmd = [sys.executable, "-m", "torch.distributed.run", "--standalone", f"--nproc_per_node={nprocs}", os.path.join(_HERE, "llm.py")]
+    out = subprocess.run(cmd + extra, capture_output=True, text=True, cwd=_HERE)
+    if out.returncode != 0:
+        raise RuntimeError(f"llm.py failed with {nprocs} process(es):\n{out.stderr[-2000:]}")
+    return out.stdout
+
+
+def bench_ddp(nprocs_list: List[int], threads: int = 1, batch_size: int = 8, steps: int = 40, n_samples: int = 4000) -> Dict[str, object]:
+    """
+    Weak scaling of the gloo data-parallel mode: fixed per-process batch and step
+    count, growing process count. Near-linear means tokens/s grows with processes
+    (efficiency = speedup / processes close to 1).
+    """
+    work = tempfile.mkdtemp(prefix="bench_llm_")
+    corpus = write_corpus(os.path.join(work, "train.jsonl"), n_samples)
+    model = build_tiny_t5(os.path.join(work, "tiny-t5"), corpus)
+
+    report: Dict[str, object] = {"threads_per_proc": threads, "batch_size": batch_size, "steps": steps, "runs": []}
+    base = None
+    for n in nprocs_list:
+        stdout = _run_llm(n, [
+            "--model_name", model,
+            "--train_file", corpus,
+            "--output_dir", os.path.join(work, f"out-{n}"),
+            "--batch_size", str(batch_size),
+            "--max_steps", str(steps),
+            "--save_steps", "0",
+            "--logging_steps", str(steps + 1),
+            "--num_threads", str(threads),
+            "--group_by_length",
+            "--no_cuda",
+        ])
+        m = re.search(r"Train throughput: ([\d.]+) tokens/s", stdout)
+        tps = float(m.group(1)) if m else 0.0
+        base = base or tps
+        report["runs"].append({
+            "processes": n,
+            "tokens_per_sec": round(tps, 1),
+            "speedup": round(tps / base, 2) if base else None,
+            "efficiency": round(tps / base / n, 2) if base else None,
+        })
+    return report
+
+
+def bench_checkpoint(save_steps: int = 5, steps: int = 40, batch_size: int = 8) -> Dict[str, object]:
+    """Training time lost to full-state checkpoints: synchronous writes vs the async writer."""
+    work = tempfile.mkdtemp(prefix="bench_llm_")
+    corpus = write_corpus(os.path.join(work, "train.jsonl"), 2000)
+    model = build_tiny_t5(os.path.join(work, "tiny-t5"), corpus)
+
+    report: Dict[str, object] = {"save_steps": save_steps, "steps": steps, "runs": []}
+    for mode in ("sync", "async"):
+        stdout = _run_llm(1, [
+            "--model_name", model,
+            "--train_file", corpus,
+            "--output_dir", os.path.join(work, f"out-{mode}"),
+            "--batch_size", str(batch_size),
+            "--max_steps", str(steps),
+            "--save_steps", str(save_steps),
+            "--logging_steps", str(steps + 1),
+            "--no_cuda",
+        ] + (["--sync_checkpoints"] if mode == "sync" else []))
+        m = re.search(r"Checkpointing: (\d+) save\(s\) blocked training for ([\d.]+)s", stdout)
+        t = re.search(r"Train throughput: ([\d.]+) tokens/s .* in ([\d.]+)s", stdout)
+        report["runs"].append({
+            "mode": mode,
+            "saves": int(m.group(1)) if m else 0,
+            "blocked_s": float(m.group(2)) if m else None,
+            "train_s": float(t.group(2)) if t else None,
+            "tokens_per_sec": float(t.group(1)) if t else None,
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="llm.py training benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("ddp", help="tokens/s scaling of torchrun + gloo data parallelism")
+    p.add_argument("--nprocs", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--threads", type=int, default=1, help="intra-op threads per process")
+    p.add_argument("--batch_size", type=int, default=8)
+    p.add_argument("--steps", type=int, default=40)
+
+    p = sub.add_parser("checkpoint", help="training time blocked by sync vs async full-state checkpoints")
+    p.add_argument("--save_steps", type=int, default=5)
+    p.add_argument("--steps", type=int, default=40)
+
+    args = parser.parse_args()
+    if args.bench == "checkpoint":
+        result = bench_checkpoint(args.save_steps, args.steps)
+    elif args.bench == "ddp":
+        result = bench_ddp(args.nprocs, args.threads, args.batch_size, args.steps)
+    print(json.dumps(result, indent=2))
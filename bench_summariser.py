@@ -0,0 +1,569 @@
+# bench_summariser.py
+# Small CPU benchmarks for meeting_summariser.py.
+#
+# Usage:
+#   python bench_summariser.py batching --model sshleifer/distilbart-cnn-12-6 --words 6000
+#   python bench_summariser.py suite --out bench/$(git rev-parse --short HEAD).json
+#   python bench_summariser.py compare bench/old.json bench/new.json
+#
+# Every benchmark prints a JSON report so runs can be compared between commits.
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List
+
+# Benchmarks are CPU numbers; hide GPUs before torch gets imported.
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import meeting_summariser as ms
+
+
+_WORDS = (
+    "team launch review schedule backend api schema design deploy release customer "
+    "feedback metrics dashboard budget quarter roadmap hiring security audit testing "
+    "migration database latency incident retro planning sprint demo onboarding"
+).split()
+
+
+def synthetic_transcript(n_words: int, seed: int = 0) -> str:
+    """
+    Meeting-like text with sentences of 8-20 words and the odd action item,
+    so chunking, RAKE and the action-item regexes all have something to do.
+    """
+    rng = random.Random(seed)
+    sents: List[str] = []
+    total = 0
+    while total < n_words:
+        k = rng.randint(8, 20)
+        words = [rng.choice(_WORDS) for _ in range(k)]
+        if rng.random() < 0.1:
+            words = ["Priya", "will"] + words + ["by", "Oct", str(rng.randint(1, 28))]
+        sents.append(" ".join(words).capitalize() + ".")
+        total += len(words)
+    return " ".join(sents)
+
+
+# Lines in the style of real meeting notes (names, dates, blockers, decisions)
+_SAMPLE_LINES = [
+    "Team met to discuss Q4 launch timelines.",
+    "Priya will finalize UI copy by Oct 22.",
+    "Please create the deployment checklist.",
+    "Let's prepare the UAT plan this week.",
+    "Backend integration is blocked on API v2 and Rohit will update the schema by Friday.",
+    "We agreed to target a soft launch on Nov 10 pending security review.",
+    "Customer feedback on the beta has been mostly positive, although onboarding is still confusing.",
+    "The latency dashboard shows p95 creeping up after the last database migration.",
+    "Anita raised a concern that the hiring plan does not cover the support rotation.",
+    "Action item: Marco to schedule the incident retro before the next sprint demo.",
+    "Budget for the quarter is fixed, so the audit has to fit inside the existing contract.",
+    "I'm not sure the roadmap still makes sense if the API slips another two weeks.",
+    "Great progress on testing; coverage for the billing service is finally above eighty percent.",
+    "We need to decide whether the mobile release ships with the new design or waits.",
+]
+
+
+def sample_transcript(n_words: int, seed: int = 0) -> str:
+    """Shuffled realistic meeting lines repeated up to n_words."""
+    rng = random.Random(seed)
+    sents: List[str] = []
+    total = 0
+    while total < n_words:
+        line = rng.choice(_SAMPLE_LINES)
+        sents.append(line)
+        total += len(line.split())
+    return " ".join(sents)
+
+
+def bench_batching(model_name: str, n_words: int, batch_sizes: List[int], repeats: int = 1) -> Dict[str, object]:
+    """
+    Compares one pipeline call per chunk (batch_size=1) with batched generation
+    on the same transcript and checks that the summaries are identical.
+    """
+    text = synthetic_transcript(n_words)
+    _, tokenizer = ms._load_bart(model_name)
+    n_chunks = len(ms._chunk_token_ids(ms.clean_text(text), tokenizer))
+
+    # Warm-up so the first timed run doesn't pay lazy init costs
+    ms.bart_summary(synthetic_transcript(300, seed=1), model_name=model_name, batch_size=1, use_cache=False)
+
+    report: Dict[str, object] = {"model": model_name, "words": n_words, "chunks": n_chunks, "runs": []}
+    baseline = None
+    for bs in [1] + [b for b in batch_sizes if b != 1]:
+        times = []
+        out = ""
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            out = ms.bart_summary(text, model_name=model_name, batch_size=bs, use_cache=False)
+            times.append(time.perf_counter() - t0)
+        if baseline is None:
+            baseline = out
+        best = min(times)
+        report["runs"].append({
+            "batch_size": bs,
+            "seconds": round(best, 3),
+            "chunks_per_sec": round(n_chunks / best, 3),
+            "same_as_sequential": out == baseline,
+        })
+    return report
+
+
+def bench_mapreduce(model_name: str, n_words: int, workers_list: List[int], fan_in: int = 4) -> Dict[str, object]:
+    """
+    Map-reduce summary of one long transcript with an increasing number of
+    worker processes (0 = in-process). Pool start-up and model loading are
+    excluded: each pool is warmed on a short text before timing.
+    """
+    text = synthetic_transcript(n_words)
+    report: Dict[str, object] = {"model": model_name, "words": n_words, "fan_in": fan_in, "runs": []}
+    for w in workers_list:
+        ms.bart_summary(synthetic_transcript(300, seed=1), model_name=model_name, workers=w, use_cache=False)
+        t0 = time.perf_counter()
+        ms.bart_summary(text, model_name=model_name, workers=w, fan_in=fan_in, use_cache=False)
+        report["runs"].append({"workers": w, "seconds": round(time.perf_counter() - t0, 3)})
+        ms.shutdown_map_pool()
+    return report
+
+
+def bench_analyzers(n_words: int = 2000, calls: int = 50) -> Dict[str, object]:
+    """
+    Per-call latency of the RAKE / VADER / TF-IDF stages when the analyzer is
+    constructed on every call (the old behaviour) vs the shared instances.
+    """
+    from rake_nltk import Rake
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    text = synthetic_transcript(n_words)
+    corpus = [synthetic_transcript(n_words, seed=s) for s in range(20)]
+
+    def per_call(fn):
+        fn()  # first call pays one-off loading for both variants
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        return round((time.perf_counter() - t0) / calls * 1000, 3)
+
+    def fresh_rake():
+        r = Rake()
+        r.extract_keywords_from_text(text)
+        return r.get_ranked_phrases()
+
+    report: Dict[str, object] = {"words": n_words, "calls": calls}
+    report["rake_ms"] = {"fresh": per_call(fresh_rake), "shared": per_call(lambda: ms.extract_key_points(text))}
+    report["vader_ms"] = {
+        "fresh": per_call(lambda: SentimentIntensityAnalyzer().polarity_scores(text)),
+        "shared": per_call(lambda: ms.sentiment_and_tone(text)),
+    }
+    idf = ms.fit_topic_idf(corpus)
+    ms._TOPIC_IDF = None  # keep the default path per-document for the "fresh" number
+    report["tfidf_ms"] = {
+        "fresh": per_call(lambda: ms.topic_ngrams(text)),
+        "corpus_idf": per_call(lambda: ms.topic_ngrams(text, idf_model=idf)),
+    }
+    return report
+
+
+def bench_extractive(sizes: List[int], max_sentences: int = 6) -> Dict[str, object]:
+    """
+    extractive_summary (sparse TF-IDF + PageRank + MMR) vs summa TextRank latency,
+    with the size of the top-k similarity graph and the time to build it.
+    """
+    report: Dict[str, object] = {"runs": []}
+    for n_words in sizes:
+        doc = ms.Transcript(synthetic_transcript(n_words))
+        t0 = time.perf_counter()
+        ms.extractive_summary(doc, max_sentences=max_sentences)
+        run = {"words": n_words, "sentences": len(doc), "fast_ms": round((time.perf_counter() - t0) * 1000, 1)}
+        X = ms._sentence_vectors(doc)
+        t0 = time.perf_counter()
+        graph = ms._similarity_graph(X)
+        run["graph_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        run["edges"] = graph.nnz // 2  # symmetric: each edge is stored twice
+        if ms.textrank_summarize is not None:
+            t0 = time.perf_counter()
+            ms.textrank_summarize(doc.text, ratio=0.15, split=False)
+            run["summa_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            run["speedup"] = round(run["summa_ms"] / max(run["fast_ms"], 1e-3), 1)
+        report["runs"].append(run)
+    return report
+
+
+def _rouge_f(pred: str, ref: str) -> Dict[str, float]:
+    """Dependency-free ROUGE-1 and ROUGE-L F1 on lowercased whitespace tokens."""
+    p, r = pred.lower().split(), ref.lower().split()
+    if not p or not r:
+        return {"rouge1": 0.0, "rougeL": 0.0}
+    overlap = sum((Counter(p) & Counter(r)).values())
+    # LCS by dynamic programming over the shorter sequence
+    prev = [0] * (len(r) + 1)
+    for a in p:
+        cur = [0]
+        for j, b in enumerate(r):
+            cur.append(prev[j] + 1 if a == b else max(prev[j + 1], cur[j]))
+        prev = cur
+    lcs = prev[-1]
+
+    def f(hit):
+        return 0.0 if hit == 0 else 2 * hit / (len(p) + len(r))
+
+    return {"rouge1": round(f(overlap), 4), "rougeL": round(f(lcs), 4)}
+
+
+def bench_prefilter(model_name: str, ratios: List[float], n_docs: int = 5, n_words: int = 6000) -> Dict[str, object]:
+    """
+    Salience pre-filtering at several compression ratios: chunk count and latency
+    against ROUGE of the summary vs. the full-input summary of the same transcript.
+    """
+    texts = [synthetic_transcript(n_words, seed=s) for s in range(n_docs)]
+    _, tokenizer = ms._load_bart(model_name)
+    ms.bart_summary(synthetic_transcript(300, seed=99), model_name=model_name, use_cache=False)
+
+    full: List[str] = []
+    report: Dict[str, object] = {"model": model_name, "docs": n_docs, "words": n_words, "runs": []}
+    for ratio in [1.0] + [r for r in ratios if r < 1.0]:
+        chunks, secs, outs = 0, 0.0, []
+        for t in texts:
+            doc = ms.salience_prefilter(t, tokenizer, ratio=ratio)
+            chunks += len(ms._chunk_token_ids(doc, tokenizer))
+            t0 = time.perf_counter()
+            outs.append(ms.bart_summary(t, model_name=model_name, compression=ratio, use_cache=False))
+            secs += time.perf_counter() - t0
+        if ratio == 1.0:
+            full = outs
+        scores = [_rouge_f(p, ref) for p, ref in zip(outs, full)]
+        report["runs"].append({
+            "ratio": ratio,
+            "chunks_per_doc": round(chunks / n_docs, 2),
+            "sec_per_doc": round(secs / n_docs, 3),
+            "rouge1_vs_full": round(sum(s["rouge1"] for s in scores) / n_docs, 4),
+            "rougeL_vs_full": round(sum(s["rougeL"] for s in scores) / n_docs, 4),
+        })
+    return report
+
+
+def _backend_worker(model_name: str, backend: str, texts: List[str], out):
+    # Own process per backend so peak RSS isn't polluted by the other runtimes
+    ms.export_backend(model_name, backend)  # one-time cost, not part of the numbers
+    t0 = time.perf_counter()
+    ms._load_bart(model_name, backend)
+    load_s = time.perf_counter() - t0
+    ms.bart_summary(synthetic_transcript(300, seed=1), model_name=model_name, backend=backend, use_cache=False)
+    t0 = time.perf_counter()
+    summaries = [ms.bart_summary(t, model_name=model_name, backend=backend, use_cache=False) for t in texts]
+    secs = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    out.put({"load_s": load_s, "seconds": secs, "peak_rss_mb": rss_mb, "summaries": summaries})
+
+
+def bench_backends(model_name: str, backends: List[str], n_docs: int = 5, n_words: int = 1500) -> Dict[str, object]:
+    """
+    Latency, peak RSS and ROUGE drift of each inference backend against the fp32
+    "torch" baseline on the same synthetic transcripts.
+    """
+    import multiprocessing
+
+    texts = [synthetic_transcript(n_words, seed=s) for s in range(n_docs)]
+    ctx = multiprocessing.get_context("spawn")
+    runs: Dict[str, Dict] = {}
+    for backend in ["torch"] + [b for b in backends if b != "torch"]:
+        q = ctx.Queue()
+        proc = ctx.Process(target=_backend_worker, args=(model_name, backend, texts, q))
+        proc.start()
+        runs[backend] = q.get()
+        proc.join()
+
+    base = runs["torch"]["summaries"]
+    report: Dict[str, object] = {"model": model_name, "docs": n_docs, "words": n_words, "backends": {}}
+    for backend, r in runs.items():
+        scores = [_rouge_f(p, ref) for p, ref in zip(r["summaries"], base)]
+        report["backends"][backend] = {
+            "load_s": round(r["load_s"], 2),
+            "sec_per_doc": round(r["seconds"] / n_docs, 3),
+            "speedup_vs_fp32": round(runs["torch"]["seconds"] / r["seconds"], 2),
+            "peak_rss_mb": round(r["peak_rss_mb"], 1),
+            "rouge1_vs_fp32": round(sum(s["rouge1"] for s in scores) / len(scores), 4),
+            "rougeL_vs_fp32": round(sum(s["rougeL"] for s in scores) / len(scores), 4),
+        }
+    return report
+
+
+def _percentile(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else 0.0
+
+
+def bench_live(model_name: str, minutes: int = 120, wpm: int = 150, segment_words: int = 30, snapshot_every: int = 10) -> Dict[str, object]:
+    """
+    Simulated live meeting: feeds ~segment_words at a time (minutes * wpm words in
+    total) into a MeetingSummarizer and times snapshot() every snapshot_every
+    segments. Flat latency across the feed means refresh cost doesn't grow.
+    """
+    words = synthetic_transcript(minutes * wpm).split()
+    live = ms.MeetingSummarizer(bart_model=model_name)
+    feed_times: List[float] = []
+    snaps: List[Dict[str, float]] = []
+    for k, i in enumerate(range(0, len(words), segment_words)):
+        t0 = time.perf_counter()
+        live.feed(" ".join(words[i : i + segment_words]))
+        feed_times.append(time.perf_counter() - t0)
+        if (k + 1) % snapshot_every == 0:
+            t0 = time.perf_counter()
+            live.snapshot()
+            snaps.append({"minute": round(i / wpm, 1), "ms": round((time.perf_counter() - t0) * 1000, 1)})
+    ms_list = [s["ms"] for s in snaps]
+    quarter = max(1, len(ms_list) // 4)
+    return {
+        "model": model_name,
+        "words": len(words),
+        "feed_ms_p50": round(_percentile(feed_times, 0.5) * 1000, 2),
+        "feed_ms_p95": round(_percentile(feed_times, 0.95) * 1000, 2),
+        "snapshot_ms_p50": _percentile(ms_list, 0.5),
+        "snapshot_ms_p95": _percentile(ms_list, 0.95),
+        "snapshot_ms_first_quarter_mean": round(sum(ms_list[:quarter]) / quarter, 1),
+        "snapshot_ms_last_quarter_mean": round(sum(ms_list[-quarter:]) / quarter, 1),
+        "snapshots": snaps,
+    }
+
+
+def build_tiny_model(path: str, vocab_size: int = 2000, seed: int = 0) -> str:
+    """
+    Randomly initialised 2-layer BART plus a BPE tokenizer trained on the synthetic
+    and sample corpora, saved to path. Lets bart_summary run offline in seconds;
+    the summaries are nonsense, the timings are what matters. Reused if present.
+    """
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    specials = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    corpus = [synthetic_transcript(2000, seed=s) for s in range(5)] + [sample_transcript(2000, seed=s) for s in range(5)]
+    tok.train_from_iterator(
+        corpus,
+        trainers.BpeTrainer(vocab_size=vocab_size, special_tokens=specials, initial_alphabet=pre_tokenizers.ByteLevel.alphabet()),
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tok,
+        bos_token="<s>", pad_token="<pad>", eos_token="</s>", unk_token="<unk>", mask_token="<mask>",
+        model_max_length=1024,
+    )
+
+    torch.manual_seed(seed)
+    config = BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=64,
+        encoder_layers=2,
+        decoder_layers=2,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=128,
+        decoder_ffn_dim=128,
+        max_position_embeddings=1024,
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+        forced_eos_token_id=tokenizer.eos_token_id,
+    )
+    model = BartForConditionalGeneration(config).eval()
+    os.makedirs(path, exist_ok=True)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+def _measure(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    """
+    Latency over `repeats` timed calls, then one more call under tracemalloc for
+    the peak Python-heap allocation (numpy included, torch tensors not).
+    """
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50_ms": round(_percentile(times, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(times, 0.95) * 1000, 2),
+        "peak_alloc_mb": round(peak / 2**20, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+SUITE_TARGETS = ("analyse_meeting", "bart_summary", "extract_key_points", "topic_ngrams", "extract_action_items")
+
+
+def bench_suite(
+    sizes: List[int],
+    model_path: str,
+    targets: List[str] = SUITE_TARGETS,
+    corpora: List[str] = ("synthetic", "sample"),
+    repeats: int = 5,
+) -> Dict[str, object]:
+    """
+    Latency (p50/p95), throughput (words/s at p50) and peak allocation of the
+    public entry points across transcript sizes, with a tiny local BART so the
+    abstractive path runs offline. Caches are bypassed so every call does the work.
+    """
+    model = build_tiny_model(model_path)
+    calls: Dict[str, Callable[[str], object]] = {
+        "analyse_meeting": lambda t: ms.analyse_meeting(t, bart_model=model, use_cache=False),
+        "bart_summary": lambda t: ms.bart_summary(t, model_name=model, use_cache=False),
+        "extract_key_points": lambda t: ms.extract_key_points(t),
+        "topic_ngrams": lambda t: ms.topic_ngrams(t),
+        "extract_action_items": lambda t: ms.extract_action_items(t),
+    }
+    make = {"synthetic": synthetic_transcript, "sample": sample_transcript}
+
+    # Model load, NLTK data and lazy analyzers are paid here, not in the first timed call
+    warm = sample_transcript(300, seed=99)
+    for name in targets:
+        calls[name](warm)
+
+    runs: List[Dict[str, object]] = []
+    for corpus in corpora:
+        for n_words in sizes:
+            text = make[corpus](n_words)
+            for name in targets:
+                stats = _measure(lambda: calls[name](text), repeats)
+                stats["words_per_sec"] = round(n_words / max(stats["p50_ms"] / 1000, 1e-9), 1)
+                runs.append({"target": name, "corpus": corpus, "words": n_words, **stats})
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS, KiB elsewhere
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": "tiny-bart (local, random weights)",
+        "repeats": repeats,
+        "peak_rss_mb": round(peak_rss / (2**20 if sys.platform == "darwin" else 1024), 1),
+        "runs": runs,
+    }
+
+
+def compare_reports(old: Dict[str, object], new: Dict[str, object], threshold: float = 0.1) -> Dict[str, object]:
+    """p50 ratio new/old per (target, corpus, words); flags anything slower by more than threshold."""
+    key = lambda r: (r["target"], r["corpus"], r["words"])  # noqa: E731
+    before = {key(r): r for r in old["runs"]}
+    rows, regressions = [], 0
+    for r in new["runs"]:
+        o = before.get(key(r))
+        if o is None:
+            continue
+        ratio = r["p50_ms"] / max(o["p50_ms"], 1e-6)
+        slower = ratio > 1 + threshold
+        regressions += slower
+        rows.append({
+            "target": r["target"], "corpus": r["corpus"], "words": r["words"],
+            "p50_ms_old": o["p50_ms"], "p50_ms_new": r["p50_ms"], "ratio": round(ratio, 3),
+            "peak_alloc_mb_old": o["peak_alloc_mb"], "peak_alloc_mb_new": r["peak_alloc_mb"],
+            "regression": slower,
+        })
+    return {"old": old.get("commit"), "new": new.get("commit"), "threshold": threshold, "regressions": regressions, "runs": rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="meeting_summariser CPU benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("batching", help="sequential vs batched chunk summarization")
+    p.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    p.add_argument("--words", type=int, default=6000)
+    p.add_argument("--batch_sizes", type=int, nargs="+", default=[4, 8, 16])
+    p.add_argument("--repeats", type=int, default=1)
+
+    p = sub.add_parser("mapreduce", help="map-reduce scaling with worker processes")
+    p.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    p.add_argument("--words", type=int, default=30000)
+    p.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    p.add_argument("--fan_in", type=int, default=4)
+
+    p = sub.add_parser("live", help="MeetingSummarizer snapshot latency over a simulated meeting")
+    p.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    p.add_argument("--minutes", type=int, default=120)
+    p.add_argument("--snapshot_every", type=int, default=10)
+
+    p = sub.add_parser("analyzers", help="fresh vs shared RAKE/VADER/TF-IDF per-call latency")
+    p.add_argument("--words", type=int, default=2000)
+    p.add_argument("--calls", type=int, default=50)
+
+    p = sub.add_parser("backends", help="fp32 vs int8 vs onnx latency, RSS and ROUGE drift")
+    p.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    p.add_argument("--backends", nargs="+", default=["int8", "onnx"], choices=ms.BACKENDS)
+    p.add_argument("--docs", type=int, default=5)
+    p.add_argument("--words", type=int, default=1500)
+
+    p = sub.add_parser("extractive", help="extractive-fast vs summa TextRank")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+
+    p = sub.add_parser("prefilter", help="salience pre-filter: chunks/latency vs ROUGE against full input")
+    p.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    p.add_argument("--ratios", type=float, nargs="+", default=[0.75, 0.5, 0.3])
+    p.add_argument("--docs", type=int, default=5)
+    p.add_argument("--words", type=int, default=6000)
+
+    p = sub.add_parser("suite", help="latency/throughput/memory of the public API at 1k-100k words")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000, 100000])
+    p.add_argument("--targets", nargs="+", default=list(SUITE_TARGETS), choices=SUITE_TARGETS)
+    p.add_argument("--corpora", nargs="+", default=["synthetic", "sample"], choices=["synthetic", "sample"])
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--model_dir", default=os.path.join(ms._ARTIFACT_DIR, "tiny-bart"))
+    p.add_argument("--out", default="", help="also write the JSON report here")
+
+    p = sub.add_parser("compare", help="compare two suite reports")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.bench == "suite":
+        result = bench_suite(args.sizes, args.model_dir, args.targets, args.corpora, args.repeats)
+        if args.out:
+            os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+    elif args.bench == "compare":
+        with open(args.old, encoding="utf-8") as f_old, open(args.new, encoding="utf-8") as f_new:
+            result = compare_reports(json.load(f_old), json.load(f_new), args.threshold)
+    elif args.bench == "batching":
+        result = bench_batching(args.model, args.words, args.batch_sizes, args.repeats)
+    elif args.bench == "mapreduce":
+        result = bench_mapreduce(args.model, args.words, args.workers, args.fan_in)
+    elif args.bench == "analyzers":
+        result = bench_analyzers(args.words, args.calls)
+    elif args.bench == "backends":
+        result = bench_backends(args.model, args.backends, args.docs, args.words)
+    elif args.bench == "extractive":
+        result = bench_extractive(args.sizes)
+    elif args.bench == "prefilter":
+        result = bench_prefilter(args.model, args.ratios, args.docs, args.words)
+    elif args.bench == "live":
+        result = bench_live(args.model, args.minutes, snapshot_every=args.snapshot_every)
+    print(json.dumps(result, indent=2))
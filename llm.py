@@ -5,10 +5,16 @@ Features:
 - mixed precision (torch.cuda.amp)
 - gradient accumulation
 - DataCollatorForSeq2Seq padding
+- optional pre-tokenized, memory-mapped dataset cache (--token_cache_dir)
+- optional streaming over JSONL shards with windowed shuffling (--streaming)
+- CPU data-parallel training over torch.distributed (gloo) when launched with torchrun
+- multi-process data loading with prefetch and pinned memory (--num_workers)
+- length-grouped batches, token-budget batching and sequence packing (--group_by_length, --max_tokens, --pack)
 - scheduler (linear with warmup)
-- checkpointing and resume
-- periodic evaluation (optional Rouge via evaluate package)
+- asynchronous full-state checkpointing with rotation, and exact resume (--resume_from)
+- periodic evaluation (optional Rouge via evaluate package), optionally in a background process
 - deterministic seed and logging
+- per-step training metrics (--metrics_file) and an opt-in torch.profiler window (--profile_steps)
 
 Usage example:
   pip install transformers datasets evaluate accelerate torch tqdm
@@ -19,6 +25,13 @@ Usage example:
     --output_dir ./trained_model \
     --epochs 3 --batch_size 8 --lr 5e-5
 
+  # data-parallel on one machine: 8 processes, each with cores/8 threads
+  torchrun --standalone --nproc_per_node 8 llm.py --train_file data/train.jsonl --batch_size 8
+
+  # tokenize once, then every run (and every DataLoader worker) reads the cache
+  python llm.py --train_file data/train.jsonl --valid_file data/valid.jsonl \
+    --token_cache_dir ./token_cache --preprocess_only
+
 Input data format (jsonl): each line is JSON with keys: "transcript", "summary"
 
 Notes:
@@ -29,14 +42,32 @@ Notes:
 import os
 import json
 import math
+import time
 import random
+import queue
+import shutil
+import contextlib
+import csv
+import sys
+import resource
+import threading
+import multiprocessing
+import glob
+import hashlib
+import functools
 import argparse
+import itertools
+import tempfile
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
+import numpy as np
 import torch
-from torch.utils.data import Dataset, DataLoader
+import torch.distributed as dist
+from torch.utils.data import Dataset, IterableDataset, DataLoader, Sampler, BatchSampler, get_worker_info
 from torch.optim import AdamW
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data.distributed import DistributedSampler
 from transformers import (
     AutoTokenizer,
     AutoModelForSeq2SeqLM,
@@ -46,64 +77,1002 @@ from transformers import (
 from tqdm.auto import tqdm
 
 
+def iter_samples(path: str, split_key_input: str = "transcript", split_key_target: str = "summary") -> Iterator[Dict[str, str]]:
+    """Yields {"input", "target"} pairs from a JSONL file or a JSON list, skipping entries with a null field."""
+    # support jsonl or json list
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(path)
+
+    with p.open("r", encoding="utf-8") as f:
+        first = f.readline().strip()
+        f.seek(0)
+        if first.startswith("["):
+            # json list
+            entries = json.load(f)
+        else:
+            # jsonl
+            entries = (json.loads(line) for line in f if line.strip())
+        for entry in entries:
+            inp = entry.get(split_key_input, "")
+            tgt = entry.get(split_key_target, "")
+            if inp is None or tgt is None:
+                continue
+            yield {"input": str(inp), "target": str(tgt)}
+
+
 class InterviewDataset(Dataset):
-    def _init_(self, path: str, tokenizer: AutoTokenizer, max_len: int = 512, split_key_input: str = "transcript", split_key_target: str = "summary"):
-        self.samples = []
+    def __init__(self, path: str, tokenizer: AutoTokenizer, max_len: int = 512, split_key_input: str = "transcript", split_key_target: str = "summary", max_target_len: int = 128):
         self.tokenizer = tokenizer
         self.max_len = max_len
+        self.max_target_len = max_target_len
         self.split_key_input = split_key_input
         self.split_key_target = split_key_target
+        self.samples = list(iter_samples(path, split_key_input, split_key_target))
 
-        # support jsonl or json list
-        p = Path(path)
-        if not p.exists():
-            raise FileNotFoundError(path)
-
-        with p.open("r", encoding="utf-8") as f:
-            first = f.readline().strip()
-            f.seek(0)
-            if first.startswith("["):
-                # json list
-                data = json.load(f)
-                for entry in data:
-                    self._append_entry(entry)
-            else:
-                # jsonl
-                for line in f:
-                    if not line.strip():
-                        continue
-                    entry = json.loads(line)
-                    self._append_entry(entry)
-
-    def _append_entry(self, entry: Dict):
-        inp = entry.get(self.split_key_input, "")
-        tgt = entry.get(self.split_key_target, "")
-        if inp is None or tgt is None:
-            return
-        self.samples.append({"input": str(inp), "target": str(tgt)})
-
-    def _len_(self):
+    def __len__(self):
         return len(self.samples)
 
-    def _getitem_(self, idx):
-        sample = self.samples[idx]
-        model_inputs = self.tokenizer(
-            sample["input"],
-            max_length=self.max_len,
+    def __getitem__(self, idx):
+        return tokenize_sample(self.tokenizer, self.samples[idx], self.max_len, self.max_target_len)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Truncated source length of every sample (tokenized once, in batches)."""
+        if getattr(self, "_lengths", None) is None:
+            lengths = []
+            for i in range(0, len(self.samples), 1000):
+                enc = self.tokenizer([s["input"] for s in self.samples[i : i + 1000]], max_length=self.max_len, truncation=True)
+                lengths.extend(len(ids) for ids in enc["input_ids"])
+            self._lengths = np.asarray(lengths, dtype=np.int64)
+        return self._lengths
+
+
+def tokenize_sample(tokenizer, sample: Dict[str, str], max_len: int = 512, max_target_len: int = 128) -> Dict[str, List[int]]:
+    model_inputs = tokenizer(
+        sample["input"],
+        max_length=max_len,
+        padding="do_not_pad",
+        truncation=True,
+        return_tensors=None,
+    )
+    with tokenizer.as_target_tokenizer():
+        labels = tokenizer(
+            sample["target"],
+            max_length=max_target_len,
             padding="do_not_pad",
             truncation=True,
             return_tensors=None,
         )
-        with self.tokenizer.as_target_tokenizer():
-            labels = self.tokenizer(
-                sample["target"],
-                max_length=128,
-                padding="do_not_pad",
-                truncation=True,
-                return_tensors=None,
-            )
-        model_inputs["labels"] = labels["input_ids"]
-        return model_inputs
+    model_inputs["labels"] = labels["input_ids"]
+    return model_inputs
+
+
+# ---------------- Streaming shards ----------------
+def expand_shards(spec: str) -> List[str]:
+    """Comma-separated paths and/or globs -> sorted list of files."""
+    paths: List[str] = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        matches = sorted(glob.glob(part))
+        if not matches:
+            raise FileNotFoundError(part)
+        paths.extend(matches)
+    return paths
+
+
+def _line_index(path: str, index_dir: str = "", keys: tuple = ("transcript", "summary")) -> np.ndarray:
+    """
+    Byte offset of every record of a JSONL shard, skipping blank lines and
+    records with a null keys field (iter_samples skips those too). Leaving them
+    out here, rather than while streaming, keeps every record in the index a
+    sample. With index_dir the index is stored there (keyed by path, size, mtime
+    and keys) so later runs seek straight to any record without scanning the
+    shard again.
+    """
+    cache_file = None
+    if index_dir:
+        st = os.stat(path)
+        key = hashlib.sha256(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}:{list(keys)}".encode("utf-8")).hexdigest()[:24]
+        cache_file = Path(index_dir) / f"lines-{key}.npy"
+        if cache_file.exists():
+            return np.load(cache_file)
+
+    offsets = []
+    pos = 0
+    with open(path, "rb") as f:
+        if f.read(1) == b"[":
+            raise ValueError(f"{path}: streaming mode needs JSONL shards, not a JSON list")
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if all(entry.get(k, "") is not None for k in keys):
+                    offsets.append(pos)
+            pos += len(line)
+    index = np.asarray(offsets, dtype=np.int64)
+
+    if cache_file is not None:
+        Path(index_dir).mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp.npy")
+        np.save(tmp, index)
+        os.replace(tmp, cache_file)
+    return index
+
+
+class StreamingInterviewDataset(IterableDataset):
+    """
+    Streams records from JSONL shards without holding the corpus in memory.
+
+    Each shard is cut into windows of shuffle_buffer consecutive records. Every
+    epoch the window order is shuffled, and so are the records inside each window,
+    both seeded from (seed, epoch), so the record order is a pure function of the
+    epoch. Windows are read with one seek through a per-shard line index.
+
+    With DataLoader(num_workers=W) on each of world_size ranks there is one slot
+    per (rank, worker), and each slot owns an equal, contiguous share of that
+    order, so it reads only the windows its share covers (two of them partly).
+    The share is cut to a whole number of batches, so every rank runs the same
+    number of full batches and len() is exact; num_workers must match the
+    DataLoader's for len() to be right. Resuming with set_epoch(epoch,
+    start_sample=n) skips the first n records this rank handed out, by index
+    arithmetic rather than reading them. The skip assumes the DataLoader takes
+    batch_size records from each worker in turn, which is what it does.
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        tokenizer,
+        max_len: int = 512,
+        max_target_len: int = 128,
+        shuffle_buffer: int = 10000,
+        seed: int = 42,
+        batch_size: int = 1,
+        split_key_input: str = "transcript",
+        split_key_target: str = "summary",
+        index_dir: str = "",
+        rank: int = 0,
+        world_size: int = 1,
+        num_workers: int = 0,
+    ):
+        self.paths = list(paths)
+        self.tokenizer = tokenizer
+        self.max_len = max_len
+        self.max_target_len = max_target_len
+        self.shuffle_buffer = max(1, shuffle_buffer)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.split_key_input = split_key_input
+        self.split_key_target = split_key_target
+        self.indexes = [_line_index(p, index_dir, (split_key_input, split_key_target)) for p in self.paths]
+        self.rank = rank
+        self.world_size = world_size
+        self.num_workers = num_workers
+        self.epoch = 0
+        self.start_sample = 0
+
+    def __len__(self):
+        # Records this rank yields per epoch: one share per DataLoader worker
+        workers = max(1, self.num_workers)
+        return self._share(workers * self.world_size) * workers
+
+    def _share(self, slots: int) -> int:
+        # Records per slot: equal for all, whole batches unless a slot can't fill one
+        per = int(sum(len(ix) for ix in self.indexes)) // slots
+        bs = max(1, self.batch_size)
+        return per - per % bs if per >= bs else per
+
+    def set_epoch(self, epoch: int, start_sample: int = 0) -> None:
+        """Call before each epoch; start_sample > 0 resumes that epoch mid-way."""
+        self.epoch = epoch
+        self.start_sample = start_sample
+
+    def _windows(self) -> List[tuple]:
+        windows = [
+            (shard, first, min(self.shuffle_buffer, len(ix) - first))
+            for shard, ix in enumerate(self.indexes)
+            for first in range(0, len(ix), self.shuffle_buffer)
+        ]
+        order = np.random.default_rng([self.seed, self.epoch]).permutation(len(windows))
+        return [windows[i] for i in order]
+
+    def _first_owned(self, worker: int, num_workers: int, begin: int) -> int:
+        # Epoch-order position this worker resumes at: its share starts at begin,
+        # and it already handed out one batch in every num_workers before the resume point
+        if self.start_sample <= 0:
+            return begin
+        bs = max(1, self.batch_size)
+        batches = self.start_sample // bs
+        return begin + (batches // num_workers + (worker < batches % num_workers)) * bs
+
+    def _read_records(self, shard: int, rows: np.ndarray) -> List[bytes]:
+        # rows: record numbers within the shard, in the order wanted. One read of
+        # the byte span they cover; records aren't contiguous once null records
+        # are left out of the index, so pick the indexed lines out of it.
+        offsets = self.indexes[shard]
+        lo, hi = int(rows.min()), int(rows.max())
+        with open(self.paths[shard], "rb") as f:
+            f.seek(int(offsets[lo]))
+            span = f.read(int(offsets[hi + 1]) - int(offsets[lo])) if hi + 1 < len(offsets) else f.read()
+        lines = []
+        for a in (offsets[rows] - offsets[lo]).tolist():
+            end = span.find(b"\n", a)
+            lines.append(span[a : end if end >= 0 else None])
+        return lines
+
+    def __iter__(self):
+        info = get_worker_info()
+        worker, num_workers = (info.id, info.num_workers) if info is not None else (0, 1)
+        slot = worker * self.world_size + self.rank
+        share = self._share(num_workers * self.world_size)
+        k = self._first_owned(worker, num_workers, slot * share)
+        end = (slot + 1) * share
+
+        base = 0  # position of the current window's first record in the epoch order
+        for w_id, (shard, first, n) in enumerate(self._windows()):
+            if k >= end:
+                return
+            if k >= base + n:
+                base += n
+                continue
+            perm = np.random.default_rng([self.seed, self.epoch, w_id]).permutation(n)
+            stop = min(base + n, end)
+            for line in self._read_records(shard, first + perm[k - base : stop - base]):
+                entry = json.loads(line)
+                inp = entry.get(self.split_key_input, "")
+                tgt = entry.get(self.split_key_target, "")
+                yield tokenize_sample(self.tokenizer, {"input": str(inp), "target": str(tgt)}, self.max_len, self.max_target_len)
+            k = stop
+            base += n
+
+
+# ---------------- Pre-tokenized cache ----------------
+# Layout of one cache directory:
+#   input_ids.bin / labels.bin          all token ids back to back (int32)
+#   input_offsets.npy / label_offsets.npy   n+1 int64 offsets into the above
+#   meta.json                           sample count and what the cache was built from
+# The directory name is a hash of the source file, tokenizer and max lengths, so a
+# changed input or setting builds a new cache instead of reading a stale one.
+_TOKEN_DTYPE = np.int32
+
+
+def _tokenizer_fingerprint(tokenizer) -> str:
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        # Truncation/padding are per-call settings the last encode left behind
+        state = json.loads(backend.to_str())
+        state.pop("truncation", None)
+        state.pop("padding", None)
+        spec = json.dumps(state, sort_keys=True)
+    else:
+        spec = f"{type(tokenizer).__name__}:{tokenizer.name_or_path}:{len(tokenizer)}"
+    return hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+
+
+def token_cache_key(path: str, tokenizer, max_len: int, max_target_len: int, split_key_input: str = "transcript", split_key_target: str = "summary") -> str:
+    st = os.stat(path)
+    raw = json.dumps(
+        [os.path.abspath(path), st.st_size, st.st_mtime_ns, _tokenizer_fingerprint(tokenizer),
+         max_len, max_target_len, split_key_input, split_key_target]
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def build_token_cache(
+    path: str,
+    tokenizer,
+    cache_root: str,
+    max_len: int = 512,
+    max_target_len: int = 128,
+    split_key_input: str = "transcript",
+    split_key_target: str = "summary",
+    chunk_size: int = 1000,
+) -> str:
+    """
+    Tokenizes path once into flat memory-mappable arrays under cache_root and
+    returns the cache directory. Reuses an existing cache with the same key.
+    Samples are tokenized chunk_size at a time so memory stays flat.
+    """
+    key = token_cache_key(path, tokenizer, max_len, max_target_len, split_key_input, split_key_target)
+    out_dir = Path(cache_root) / key
+    if (out_dir / "meta.json").exists():
+        return str(out_dir)
+
+    Path(cache_root).mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_root))
+    offsets = {"input": [0], "label": [0]}
+    try:
+        with open(tmp_dir / "input_ids.bin", "wb") as f_in, open(tmp_dir / "labels.bin", "wb") as f_lab:
+
+            def flush(inputs: List[str], targets: List[str]) -> None:
+                enc = tokenizer(inputs, max_length=max_len, truncation=True, padding="do_not_pad")
+                with tokenizer.as_target_tokenizer():
+                    lab = tokenizer(targets, max_length=max_target_len, truncation=True, padding="do_not_pad")
+                for name, f, seqs in (("input", f_in, enc["input_ids"]), ("label", f_lab, lab["input_ids"])):
+                    for ids in seqs:
+                        offsets[name].append(offsets[name][-1] + len(ids))
+                    np.fromiter(itertools.chain.from_iterable(seqs), dtype=_TOKEN_DTYPE).tofile(f)
+
+            inputs, targets = [], []
+            for sample in tqdm(iter_samples(path, split_key_input, split_key_target), desc=f"Tokenizing {Path(path).name}"):
+                inputs.append(sample["input"])
+                targets.append(sample["target"])
+                if len(inputs) >= chunk_size:
+                    flush(inputs, targets)
+                    inputs, targets = [], []
+            if inputs:
+                flush(inputs, targets)
+
+        np.save(tmp_dir / "input_offsets.npy", np.asarray(offsets["input"], dtype=np.int64))
+        np.save(tmp_dir / "label_offsets.npy", np.asarray(offsets["label"], dtype=np.int64))
+        meta = {
+            "source": os.path.abspath(path),
+            "num_samples": len(offsets["input"]) - 1,
+            "tokenizer": tokenizer.name_or_path,
+            "max_len": max_len,
+            "max_target_len": max_target_len,
+            "dtype": np.dtype(_TOKEN_DTYPE).name,
+        }
+        (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        try:
+            os.replace(tmp_dir, out_dir)
+        except OSError:
+            # Another process finished the same cache first; theirs is identical
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return str(out_dir)
+
+
+class TokenCacheDataset(Dataset):
+    """
+    Reads samples out of a build_token_cache() directory. The id arrays are
+    memory-mapped on first access in each process (never pickled), so DataLoader
+    workers share the same page-cache pages and start without tokenizing.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.meta = json.loads((self.cache_dir / "meta.json").read_text(encoding="utf-8"))
+        self.input_offsets = np.load(self.cache_dir / "input_offsets.npy", mmap_mode="r")
+        self.label_offsets = np.load(self.cache_dir / "label_offsets.npy", mmap_mode="r")
+        self._ids = None
+        self._labels = None
+
+    def _open(self) -> None:
+        dtype = np.dtype(self.meta["dtype"])
+        self._ids = np.memmap(self.cache_dir / "input_ids.bin", dtype=dtype, mode="r")
+        self._labels = np.memmap(self.cache_dir / "labels.bin", dtype=dtype, mode="r")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_ids"] = state["_labels"] = None
+        return state
+
+    def __len__(self):
+        return int(self.meta["num_samples"])
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Source length in tokens of every sample, without reading any ids."""
+        return np.diff(self.input_offsets)
+
+    def __getitem__(self, idx):
+        if self._ids is None:
+            self._open()
+        a, b = self.input_offsets[idx], self.input_offsets[idx + 1]
+        la, lb = self.label_offsets[idx], self.label_offsets[idx + 1]
+        # Slices of the mapping; the int64 cast is the only copy (labels feed the loss as Long)
+        input_ids = self._ids[a:b].astype(np.int64)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": np.ones_like(input_ids),
+            "labels": self._labels[la:lb].astype(np.int64),
+        }
+
+
+def load_dataset(path: str, tokenizer, args, streaming: bool = False) -> Dataset:
+    """
+    Tokenized dataset for path: streamed from JSONL shards (path may be a comma
+    list or glob), memory-mapped from --token_cache_dir, or in-memory.
+    """
+    if streaming:
+        return StreamingInterviewDataset(
+            expand_shards(path),
+            tokenizer,
+            max_len=args.max_source_length,
+            max_target_len=args.max_target_length,
+            shuffle_buffer=args.shuffle_buffer,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            index_dir=args.token_cache_dir,
+            rank=getattr(args, "rank", 0),
+            world_size=getattr(args, "world_size", 1),
+            num_workers=args.num_workers,
+        )
+    if args.token_cache_dir:
+        cache = build_token_cache(path, tokenizer, args.token_cache_dir, args.max_source_length, args.max_target_length)
+        return TokenCacheDataset(cache)
+    return InterviewDataset(path, tokenizer, max_len=args.max_source_length, max_target_len=args.max_target_length)
+
+
+# ---------------- Batching ----------------
+class LengthGroupedBatchSampler(Sampler):
+    """
+    Cuts the shuffled index list into megabatches of batch_size * megabatch_mult
+    samples, sorts each megabatch by length and slices it into batches, then
+    shuffles the batch order. Batches hold similar lengths (little padding),
+    but which lengths meet, and in what order, still changes every epoch.
+
+    With max_tokens > 0 a batch is closed once its padded size (longest * count)
+    would exceed max_tokens, so batch_size only sets the megabatch size. With
+    packing the budget is the sum of lengths instead, since packed rows carry no
+    per-example padding. With world_size > 1 each rank takes every world_size-th
+    batch of the same shuffled list.
+    """
+
+    def __init__(self, lengths, batch_size: int = 8, max_tokens: int = 0, megabatch_mult: int = 50, seed: int = 42, packing: bool = False, rank: int = 0, world_size: int = 1):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.rank = rank
+        self.world_size = world_size
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.megabatch = max(1, batch_size * megabatch_mult)
+        self.seed = seed
+        self.packing = packing
+        self.epoch = 0
+        self._cache = None
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def _split(self, idx: np.ndarray) -> List[np.ndarray]:
+        if self.max_tokens <= 0:
+            return [idx[i : i + self.batch_size] for i in range(0, len(idx), self.batch_size)]
+        batches, start, total = [], 0, 0
+        for j, i in enumerate(idx):
+            n = int(self.lengths[i])
+            # idx is sorted longest first, so the first element sets the padded width
+            cost = total + n if self.packing else int(self.lengths[idx[start]]) * (j - start + 1)
+            if j > start and cost > self.max_tokens:
+                batches.append(idx[start:j])
+                start, total = j, 0
+            total += n
+        batches.append(idx[start:])
+        return batches
+
+    def _batches(self) -> List[np.ndarray]:
+        if self._cache is not None and self._cache[0] == self.epoch:
+            return self._cache[1]
+        rng = np.random.default_rng([self.seed, self.epoch])
+        order = rng.permutation(len(self.lengths))
+        batches: List[np.ndarray] = []
+        for i in range(0, len(order), self.megabatch):
+            mega = order[i : i + self.megabatch]
+            mega = mega[np.argsort(-self.lengths[mega], kind="stable")]
+            batches.extend(self._split(mega))
+        batches = [batches[i] for i in rng.permutation(len(batches))]
+        # Distributed: every rank gets the same number of batches (DDP steps in lockstep)
+        per_rank = len(batches) // self.world_size
+        batches = batches[self.rank : per_rank * self.world_size : self.world_size]
+        self._cache = (self.epoch, batches)
+        return batches
+
+    def __iter__(self):
+        for b in self._batches():
+            yield b.tolist()
+
+    def __len__(self):
+        return len(self._batches())
+
+
+def check_packable(model) -> None:
+    # Packed rows put several examples side by side; absolute position embeddings
+    # (BART, Pegasus) would see later examples at the wrong positions. The masks
+    # ride on the first layer's shared position biases (_block_masks), so models
+    # with a bias per layer (UMT5) or local attention (LongT5) are out.
+    if getattr(model.config, "model_type", "") not in ("t5", "mt5"):
+        raise ValueError(f"--pack needs a T5 or mT5 model, not {model.config.model_type!r}")
+
+
+class Seq2SeqPackingCollator:
+    """
+    Packs a batch of tokenized examples into as few rows as fit in max_len source
+    and max_target_len target tokens (first-fit decreasing). Attention stays inside
+    each example: a block-diagonal encoder mask, a block-diagonal causal decoder
+    mask and a cross-attention mask from each target block to its own source block.
+    Padding at the end of a row forms one more block, so no query is fully masked.
+    Use with model_forward(), which routes the masks to the encoder and decoder.
+    """
+
+    def __init__(self, pad_token_id: int, decoder_start_token_id: int, max_len: int = 512, max_target_len: int = 512):
+        self.pad_token_id = pad_token_id
+        self.decoder_start_token_id = decoder_start_token_id
+        self.max_len = max_len
+        self.max_target_len = max_target_len
+
+    def _rows(self, features: List[Dict]) -> List[List[int]]:
+        rows: List[List[int]] = []
+        used: List[List[int]] = []  # [source tokens, target tokens] per row
+        for i in sorted(range(len(features)), key=lambda i: -len(features[i]["input_ids"])):
+            ls, lt = len(features[i]["input_ids"]), len(features[i]["labels"])
+            for r, (us, ut) in enumerate(used):
+                if us + ls <= self.max_len and ut + lt <= self.max_target_len:
+                    rows[r].append(i)
+                    used[r] = [us + ls, ut + lt]
+                    break
+            else:
+                rows.append([i])
+                used.append([ls, lt])
+        return rows
+
+    def __call__(self, features: List[Dict]) -> Dict[str, torch.Tensor]:
+        rows = self._rows(features)
+        src_len = max(sum(len(features[i]["input_ids"]) for i in row) for row in rows)
+        tgt_len = max(sum(len(features[i]["labels"]) for i in row) for row in rows)
+        n = len(rows)
+        input_ids = torch.full((n, src_len), self.pad_token_id, dtype=torch.long)
+        enc_mask = torch.zeros((n, src_len, src_len), dtype=torch.long)
+        decoder_input_ids = torch.full((n, tgt_len), self.pad_token_id, dtype=torch.long)
+        dec_mask = torch.zeros((n, tgt_len, tgt_len), dtype=torch.long)
+        cross_mask = torch.zeros((n, tgt_len, src_len), dtype=torch.long)
+        labels = torch.full((n, tgt_len), -100, dtype=torch.long)
+        for r, row in enumerate(rows):
+            s = t = 0
+            for i in row:
+                src = torch.as_tensor(features[i]["input_ids"], dtype=torch.long)
+                lab = torch.as_tensor(features[i]["labels"], dtype=torch.long)
+                ls, lt = len(src), len(lab)
+                input_ids[r, s : s + ls] = src
+                enc_mask[r, s : s + ls, s : s + ls] = 1
+                labels[r, t : t + lt] = lab
+                decoder_input_ids[r, t] = self.decoder_start_token_id
+                decoder_input_ids[r, t + 1 : t + lt] = lab[:-1]
+                dec_mask[r, t : t + lt, t : t + lt] = torch.tril(torch.ones((lt, lt), dtype=torch.long))
+                cross_mask[r, t : t + lt, s : s + ls] = 1
+                s += ls
+                t += lt
+            enc_mask[r, s:, s:] = 1
+            dec_mask[r, t:, t:] = torch.tril(torch.ones((tgt_len - t, tgt_len - t), dtype=torch.long))
+        return {
+            "input_ids": input_ids,
+            "attention_mask": enc_mask,
+            "cross_attention_mask": cross_mask,
+            "decoder_input_ids": decoder_input_ids,
+            "decoder_attention_mask": dec_mask,
+            "labels": labels,
+        }
+
+
+@contextlib.contextmanager
+def _block_masks(model, batch: Dict[str, torch.Tensor]):
+    """
+    Applies the [n, q, k] 0/1 block masks of a packed batch through a T5 model's
+    position biases. The first layer of each stack computes the bias that every
+    later layer reuses, so the masks go in there: onto the relative bias of both
+    self-attentions, and in place of the (otherwise zero) cross-attention bias.
+    The stacks get no masks of their own, as the shapes they accept differ between
+    transformers releases (2-D only since 4.46).
+    """
+    enc_attn = model.encoder.block[0].layer[0].SelfAttention
+    dec_attn = model.decoder.block[0].layer[0].SelfAttention
+    cross_attn = model.decoder.block[0].layer[1].EncDecAttention
+
+    def masked_bias(compute_bias, allowed):
+        def inner(*args, **kwargs):
+            bias = compute_bias(*args, **kwargs)
+            return torch.where(allowed, bias, bias.new_tensor(torch.finfo(bias.dtype).min))
+
+        return inner
+
+    def cross_bias(forward, allowed):
+        def inner(hidden_states, *args, position_bias=None, **kwargs):
+            if position_bias is None:
+                position_bias = torch.zeros(allowed.shape, dtype=hidden_states.dtype, device=hidden_states.device)
+                position_bias.masked_fill_(~allowed, torch.finfo(hidden_states.dtype).min)
+            return forward(hidden_states, *args, position_bias=position_bias, **kwargs)
+
+        return inner
+
+    enc_attn.compute_bias = masked_bias(enc_attn.compute_bias, batch["attention_mask"][:, None].bool())
+    dec_attn.compute_bias = masked_bias(dec_attn.compute_bias, batch["decoder_attention_mask"][:, None].bool())
+    cross_attn.forward = cross_bias(cross_attn.forward, batch["cross_attention_mask"][:, None].bool())
+    try:
+        yield
+    finally:
+        del enc_attn.compute_bias, dec_attn.compute_bias, cross_attn.forward
+
+
+def model_forward(model, batch: Dict[str, torch.Tensor]):
+    if "cross_attention_mask" not in batch:
+        return model(**batch)
+    with _block_masks(getattr(model, "module", model), batch):
+        return model(input_ids=batch["input_ids"], decoder_input_ids=batch["decoder_input_ids"], labels=batch["labels"])
+
+
+def batch_token_counts(batch: Dict[str, torch.Tensor], pad_token_id: int):
+    """(real, padded) token counts over source and target of a CPU batch."""
+    real = int(batch["input_ids"].ne(pad_token_id).sum())
+    total = batch["input_ids"].numel()
+    if "labels" in batch:
+        real += int(batch["labels"].ne(-100).sum())
+        total += batch["labels"].numel()
+    return real, total
+
+
+def batch_sample_count(batch: Dict[str, torch.Tensor]) -> int:
+    """Examples in a CPU batch; a packed row holds several, one causal block each."""
+    if "cross_attention_mask" not in batch:
+        return batch["input_ids"].size(0)
+    mask = batch["decoder_attention_mask"].bool()
+    # A block starts where a position attends to itself but not to the one before
+    # it; the trailing padding block has no labels
+    diag = mask.diagonal(dim1=1, dim2=2)
+    prev = torch.nn.functional.pad(mask.diagonal(offset=-1, dim1=1, dim2=2), (1, 0))
+    return int((diag & ~prev & batch["labels"].ne(-100)).sum())
+
+
+# ---------------- Distributed ----------------
+def init_distributed(args):
+    """
+    Joins the process group when launched by torchrun (WORLD_SIZE > 1) and
+    returns (rank, world_size, local_rank); (0, 1, 0) for a plain launch.
+    """
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    if world_size <= 1:
+        return 0, 1, 0
+    dist.init_process_group(backend=args.ddp_backend)
+    return dist.get_rank(), world_size, int(os.environ.get("LOCAL_RANK", "0"))
+
+
+def all_reduce_sum(values: List[float], device) -> List[float]:
+    """Sums a few scalars over all ranks (one collective); identity without a process group."""
+    if not (dist.is_available() and dist.is_initialized()):
+        return list(values)
+    t = torch.tensor(values, dtype=torch.float64)
+    if dist.get_backend() == "nccl":
+        t = t.to(device)
+    dist.all_reduce(t)
+    return t.cpu().tolist()
+
+
+# ---------------- Training metrics ----------------
+def parse_profile_steps(spec: str):
+    """"a:b" -> (a, b) optimizer steps, inclusive; "" -> None."""
+    if not spec:
+        return None
+    a, _, b = spec.partition(":")
+    first, last = int(a), int(b or a)
+    if first < 1 or last < first:
+        raise ValueError(f"--profile_steps wants a:b with 1 <= a <= b, got {spec!r}")
+    return first, last
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+
+class TrainMetrics:
+    """
+    Per optimizer step: data wait, forward, backward and optimizer time, samples, tokens,
+    padding fraction, learning rate, loss and peak memory, written as one JSONL or
+    CSV row (chosen by the file extension) per step.
+
+    Nothing on the hot path waits for the device. Loss stays a tensor until
+    flush(), which turns the whole window into Python numbers with one transfer.
+    On CUDA the phases are timed with events, read in the same flush; on CPU
+    they're plain wall-clock intervals. flush() also returns the window totals
+    for the log line.
+
+    With profile_steps=(a, b), torch.profiler records steps a..b (phases show
+    up as named ranges) and writes a Chrome trace plus a summary table to
+    trace_dir.
+    """
+
+    FIELDS = [
+        "step", "epoch", "loss", "lr", "data_s", "forward_s", "backward_s", "optimizer_s", "step_s",
+        "samples", "tokens", "padded_tokens", "padding_frac", "samples_per_s", "tokens_per_s", "peak_rss_mb", "peak_cuda_mb",
+    ]
+
+    def __init__(self, path: str, device, start_step: int = 0, profile_steps=None, trace_dir: str = "."):
+        self.device = device
+        self.cuda = device.type == "cuda"
+        self.profile_steps = profile_steps
+        self.trace_dir = Path(trace_dir)
+        self._file = None
+        self._csv = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, "a", encoding="utf-8", newline="")
+            if path.endswith(".csv"):
+                self._csv = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+                if new:
+                    self._csv.writeheader()
+        self._prof = None
+        self._cur = self._new_step()
+        self._steps: List[Dict] = []  # finished steps not yet flushed
+        self._t_step = self._t_window = time.perf_counter()
+        if profile_steps and profile_steps[0] == start_step + 1:
+            self._start_profiler()
+
+    def _new_step(self) -> Dict:
+        return {"data_s": 0.0, "samples": 0, "tokens": 0, "padded_tokens": 0, "phases": [], "losses": []}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        rf = torch.profiler.record_function(name) if self._prof is not None else contextlib.nullcontext()
+        with rf:
+            if self.cuda:
+                start, end = torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True)
+                start.record()
+                yield
+                end.record()
+                self._cur["phases"].append((name, start, end))
+            else:
+                t0 = time.perf_counter()
+                yield
+                self._cur["phases"].append((name, time.perf_counter() - t0, None))
+
+    def add_batch(self, data_s: float, samples: int, real: int, total: int) -> None:
+        self._cur["data_s"] += data_s
+        self._cur["samples"] += samples
+        self._cur["tokens"] += real
+        self._cur["padded_tokens"] += total
+
+    def add_loss(self, loss: torch.Tensor) -> None:
+        self._cur["losses"].append(loss.detach())
+
+    def end_step(self, step: int, epoch: int, lr: float) -> None:
+        now = time.perf_counter()
+        cur = self._cur
+        cur.update(step=step, epoch=epoch, lr=lr, step_s=now - self._t_step, peak_rss_mb=_peak_rss_mb())
+        # Host-side allocator counter, no device sync
+        cur["peak_cuda_mb"] = torch.cuda.max_memory_allocated(self.device) / 2**20 if self.cuda else None
+        self._steps.append(cur)
+        self._cur = self._new_step()
+        self._t_step = now
+        if self.profile_steps:
+            if step == self.profile_steps[1] and self._prof is not None:
+                self._stop_profiler()
+            elif step + 1 == self.profile_steps[0]:
+                self._start_profiler()
+
+    def flush(self) -> Dict[str, float]:
+        """Writes the finished steps and returns window totals (loss_sum, steps, samples, tokens, padded_tokens, data_s, elapsed_s)."""
+        now = time.perf_counter()
+        steps, self._steps = self._steps, []
+        window = {"loss_sum": 0.0, "steps": len(steps), "samples": 0, "tokens": 0, "padded_tokens": 0, "data_s": 0.0, "elapsed_s": now - self._t_window}
+        self._t_window = now
+        if not steps:
+            return window
+        # One device->host transfer for every loss in the window
+        flat = [l for st in steps for l in st["losses"]]
+        values = torch.stack(flat).float().cpu().tolist() if flat else []
+        if self.cuda:
+            torch.cuda.current_stream(self.device).synchronize()
+        i = 0
+        for st in steps:
+            n = len(st["losses"])
+            loss = sum(values[i : i + n])
+            i += n
+            row = {k: st[k] for k in ("step", "epoch", "lr", "data_s", "step_s", "samples", "tokens", "padded_tokens", "peak_rss_mb", "peak_cuda_mb")}
+            row["loss"] = loss
+            for name in ("forward", "backward", "optimizer"):
+                row[f"{name}_s"] = 0.0
+            for name, a, b in st["phases"]:
+                row[f"{name}_s"] += a.elapsed_time(b) / 1000 if self.cuda else a
+            row["padding_frac"] = 1 - st["tokens"] / max(st["padded_tokens"], 1)
+            row["samples_per_s"] = st["samples"] / max(st["step_s"], 1e-9)
+            row["tokens_per_s"] = st["tokens"] / max(st["step_s"], 1e-9)
+            window["loss_sum"] += loss
+            window["samples"] += st["samples"]
+            window["tokens"] += st["tokens"]
+            window["padded_tokens"] += st["padded_tokens"]
+            window["data_s"] += st["data_s"]
+            self._write(row)
+        if self._file is not None:
+            self._file.flush()
+        return window
+
+    def _write(self, row: Dict) -> None:
+        if self._file is None:
+            return
+        row = {k: (round(v, 6) if isinstance(v, float) else v) for k, v in row.items()}
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+
+    def _start_profiler(self) -> None:
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.cuda:
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self._prof = torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True)
+        self._prof.__enter__()
+
+    def _stop_profiler(self) -> None:
+        prof, self._prof = self._prof, None
+        prof.__exit__(None, None, None)
+        a, b = self.profile_steps
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        trace = self.trace_dir / f"profile_steps_{a}-{b}.json"
+        prof.export_chrome_trace(str(trace))
+        sort_by = "self_cuda_time_total" if self.cuda else "self_cpu_time_total"
+        (self.trace_dir / f"profile_steps_{a}-{b}.txt").write_text(prof.key_averages().table(sort_by=sort_by, row_limit=30), encoding="utf-8")
+        tqdm.write(f"Profiler trace for steps {a}-{b} written to {trace}")
+
+    def close(self) -> None:
+        if self._prof is not None:
+            self._stop_profiler()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+
+# ---------------- Checkpoints ----------------
+def _to_cpu(obj):
+    """Deep copy of a (nested) state dict with every tensor cloned to CPU memory."""
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+def rng_state() -> Dict:
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else [],
+    }
+
+
+def set_rng_state(state: Dict) -> None:
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if state["cuda"] and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def list_checkpoints(output_dir) -> List[Path]:
+    """Complete checkpoint-<step> dirs (with training state), oldest first."""
+    found = []
+    for p in Path(output_dir).glob("checkpoint-*"):
+        step = p.name.split("-", 1)[1]
+        if step.isdigit() and (p / "training_state.pt").exists():
+            found.append((int(step), p))
+    return [p for _, p in sorted(found)]
+
+
+def resolve_resume(resume_from: str, output_dir: str) -> str:
+    """--resume_from value -> checkpoint dir ("latest" = newest in output_dir, "" = none)."""
+    if resume_from == "latest":
+        ckpts = list_checkpoints(output_dir)
+        return str(ckpts[-1]) if ckpts else ""
+    if resume_from and not (Path(resume_from) / "training_state.pt").exists():
+        raise FileNotFoundError(f"{resume_from} has no training_state.pt")
+    return resume_from
+
+
+class Checkpointer:
+    """
+    Full training-state checkpoints: weights, optimizer, scheduler, GradScaler,
+    RNG and data position. save() only snapshots that state into CPU memory on
+    the training thread; a background thread writes it to a temp dir, renames it
+    into place and rotates old checkpoints (keeping the last keep_last plus the
+    best). The snapshot copy is the time training loses; blocked_s adds it up.
+    A failed background write is re-raised from the next wait() (and so save()).
+    """
+
+    def __init__(self, output_dir: str, tokenizer, keep_last: int = 3, asynchronous: bool = True, protect=None):
+        self.output_dir = Path(output_dir)
+        self.tokenizer = tokenizer
+        self.keep_last = keep_last
+        self.asynchronous = asynchronous
+        self.protect = protect  # callable -> checkpoint dirs that must not be rotated out yet
+        self.best_step = None
+        self.blocked_s = 0.0
+        self.saves = 0
+        self._thread = None
+        self._error = None
+
+    def save(self, step: int, model, optimizer, scheduler, scaler, extra: Dict, on_done=None) -> None:
+        t0 = time.perf_counter()
+        self.wait()  # at most one write in flight
+        snapshot = {
+            "model": _to_cpu(model.state_dict()),
+            "optimizer": _to_cpu(optimizer.state_dict()),
+            "scheduler": scheduler.state_dict(),
+            "scaler": scaler.state_dict(),
+            **extra,
+        }
+        if self.asynchronous:
+            blocked = time.perf_counter() - t0
+            self._thread = threading.Thread(target=self._write_async, args=(step, model, snapshot, blocked, on_done), name="checkpoint-writer")
+            self._thread.start()
+        else:
+            self._write(step, model, snapshot, None, on_done)
+            blocked = time.perf_counter() - t0
+        self.blocked_s += blocked
+        self.saves += 1
+
+    def wait(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background checkpoint write failed") from error
+
+    def _write_async(self, step: int, model, snapshot: Dict, blocked, on_done) -> None:
+        try:
+            self._write(step, model, snapshot, blocked, on_done)
+        except BaseException as e:  # surfaced by wait() on the training thread
+            self._error = e
+
+    def _write(self, step: int, model, snapshot: Dict, blocked, on_done) -> None:
+        t0 = time.perf_counter()
+        final = self.output_dir / f"checkpoint-{step}"
+        tmp = self.output_dir / f".checkpoint-{step}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        model.save_pretrained(tmp, state_dict=snapshot.pop("model"))
+        self.tokenizer.save_pretrained(tmp)
+        torch.save(snapshot, tmp / "training_state.pt")
+        if final.exists():
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+        if on_done is not None:
+            on_done(str(final))
+        self._rotate()
+        how = f"training blocked {blocked:.2f}s, " if blocked is not None else ""
+        tqdm.write(f"Saved checkpoint to {final} ({how}write {time.perf_counter() - t0:.2f}s)")
+
+    def _rotate(self) -> None:
+        if self.keep_last <= 0:
+            return
+        ckpts = list_checkpoints(self.output_dir)
+        keep = {str(p) for p in ckpts[-self.keep_last :]}
+        if self.best_step is not None:
+            keep.add(str(self.output_dir / f"checkpoint-{self.best_step}"))
+        if self.protect is not None:
+            keep.update(self.protect())
+        for p in ckpts:
+            if str(p) not in keep:
+                shutil.rmtree(p, ignore_errors=True)
+
+
+class ResumableBatchSampler(Sampler):
+    """
+    Wraps a batch sampler so an epoch can start part-way through: the first
+    `skip` batches of that epoch are dropped as index lists, so none of their
+    samples are loaded. set_epoch() is forwarded to the wrapped sampler.
+    """
+
+    def __init__(self, batch_sampler):
+        self.batch_sampler = batch_sampler
+        self.skip = 0
+
+    def set_epoch(self, epoch: int, skip: int = 0) -> None:
+        inner = self.batch_sampler
+        if hasattr(inner, "set_epoch"):
+            inner.set_epoch(epoch)
+        elif hasattr(getattr(inner, "sampler", None), "set_epoch"):
+            inner.sampler.set_epoch(epoch)
+        self.skip = skip
+
+    def __iter__(self):
+        return itertools.islice(iter(self.batch_sampler), self.skip, None)
+
+    def __len__(self):
+        return max(0, len(self.batch_sampler) - self.skip)
 
 
 def set_seed(seed: int = 42):
@@ -113,91 +1082,320 @@ def set_seed(seed: int = 42):
     torch.cuda.manual_seed_all(seed)
 
 
-def collate_fn(batch: List[Dict], tokenizer: AutoTokenizer, model=None):
-    # inputs in batch are dicts with keys: input_ids (list), attention_mask (list), labels (list)
-    # Use DataCollatorForSeq2Seq to handle padding and label masking
-    collator = DataCollatorForSeq2Seq(tokenizer, model=model, padding=True, return_tensors="pt")
-    # DataCollator expects dicts with 'input_ids' etc. Our items already match that structure
-    return collator(batch)
+class Seq2SeqCollator:
+    """
+    Pads a list of tokenized examples into a batch (labels padded with -100).
+    A plain picklable object, so DataLoader workers can run it; the underlying
+    DataCollatorForSeq2Seq is built once here rather than per batch. No model is
+    held: the seq2seq models derive decoder_input_ids from labels themselves.
+    """
 
+    def __init__(self, tokenizer, pad_to_multiple_of: int = None):
+        self.collator = DataCollatorForSeq2Seq(tokenizer, padding=True, pad_to_multiple_of=pad_to_multiple_of, return_tensors="pt")
 
-@torch.no_grad()
-def evaluate(model, tokenizer, dataloader, device, num_samples: int = 100):
-    model.eval()
-    preds, refs = [], []
+    def __call__(self, batch: List[Dict]) -> Dict[str, torch.Tensor]:
+        return self.collator(batch)
 
-    for i, batch in enumerate(dataloader):
-        batch = {k: v.to(device) for k, v in batch.items()}
-        outputs = model.generate(
-            input_ids=batch["input_ids"],
-            attention_mask=batch.get("attention_mask", None),
-            max_length=128,
-            num_beams=4,
-            early_stopping=True,
-        )
-        decoded_preds = tokenizer.batch_decode(outputs, skip_special_tokens=True)
-        labels = batch.get("labels")
-        # replace -100 in labels as tokenizer.pad_token_id
-        if labels is not None:
-            labels = labels.clone()
-            labels[labels == -100] = tokenizer.pad_token_id
-            decoded_labels = tokenizer.batch_decode(labels, skip_special_tokens=True)
-        else:
-            decoded_labels = [""] * len(decoded_preds)
 
-        preds.extend(decoded_preds)
-        refs.extend(decoded_labels)
+def make_loader(dataset, args, collate, batch_size: int = 1, shuffle: bool = False, batch_sampler=None, pin_memory: bool = False) -> DataLoader:
+    """
+    DataLoader with the --num_workers pipeline settings. Workers tokenize and
+    collate ahead of the training step (prefetch_factor batches each); pinned
+    host memory lets the device copy run asynchronously.
+    """
+    kwargs = {"collate_fn": collate, "num_workers": args.num_workers, "pin_memory": pin_memory}
+    if args.num_workers > 0:
+        kwargs["prefetch_factor"] = args.prefetch_factor
+        # A persistent worker keeps its own copy of a streaming dataset and would
+        # miss set_epoch(); samplers run in the main process, so they're fine.
+        kwargs["persistent_workers"] = args.persistent_workers and not isinstance(dataset, IterableDataset)
+    if batch_sampler is not None:
+        return DataLoader(dataset, batch_sampler=batch_sampler, **kwargs)
+    return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, **kwargs)
 
-        if len(preds) >= num_samples:
-            break
 
-    # try optional rouge (if evaluate installed)
+_ROUGE = None
+
+
+def _load_rouge():
+    """The evaluate ROUGE metric, loaded once per process; None if evaluate isn't installed."""
+    global _ROUGE
+    if _ROUGE is None:
+        try:
+            import evaluate
+
+            _ROUGE = evaluate.load("rouge")
+        except Exception:
+            _ROUGE = False
+    return _ROUGE or None
+
+
+def _rouge_scores(preds: List[str], refs: List[str]) -> Dict:
+    rouge = _load_rouge()
+    if rouge is None:
+        return {"rouge": None}
     try:
-        import evaluate
-        rouge = evaluate.load("rouge")
-        results = rouge.compute(predictions=preds, references=refs)
+        return rouge.compute(predictions=preds, references=refs)
     except Exception:
-        results = {"rouge": None}
+        return {"rouge": None}
 
-    model.train()
-    return results, preds, refs
+
+def select_metric(results) -> float:
+    # use rougeL fmeasure if available
+    if not isinstance(results, dict):
+        return None
+    # evaluate's rouge returns rouge1, rouge2, rougeL f1 scores
+    if "rougeL" in results:
+        return results.get("rougeL", 0.0)
+    if "rougeLsum" in results:
+        return results.get("rougeLsum", 0.0)
+    # fallback
+    value = list(results.values())[0] if results else 0.0
+    return value if isinstance(value, (int, float)) else None
+
+
+class Evaluator:
+    """
+    Generation + ROUGE on a fixed validation subset, with the per-call work cut to
+    generate() itself: the first num_samples examples are tokenized, collated and
+    their references decoded once, here. Batches are built longest-first so each
+    holds similar lengths, and predictions come back in dataset order.
+    Picklable (no model), so it can be shipped to a background process.
+    """
+
+    def __init__(self, dataset, tokenizer, collator, batch_size: int = 8, num_samples: int = 200, num_beams: int = 4, max_length: int = 128):
+        self.tokenizer = tokenizer
+        self.num_beams = num_beams
+        self.max_length = max_length
+        n = min(num_samples, len(dataset))
+        features = [dataset[i] for i in range(n)]
+        self.refs = tokenizer.batch_decode([list(f["labels"]) for f in features], skip_special_tokens=True)
+        order = sorted(range(n), key=lambda i: -len(features[i]["input_ids"]))
+        self.batches = []  # (dataset positions, collated inputs without labels)
+        for i in range(0, n, batch_size):
+            idx = order[i : i + batch_size]
+            batch = collator([features[j] for j in idx])
+            batch.pop("labels", None)
+            self.batches.append((idx, dict(batch)))
+
+    @torch.no_grad()
+    def run(self, model, device):
+        was_training = model.training
+        model.eval()
+        preds = [""] * len(self.refs)
+        for idx, batch in self.batches:
+            outputs = model.generate(
+                input_ids=batch["input_ids"].to(device),
+                attention_mask=batch["attention_mask"].to(device),
+                max_length=self.max_length,
+                num_beams=self.num_beams,
+                early_stopping=self.num_beams > 1,
+            )
+            for j, text in zip(idx, self.tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                preds[j] = text
+        results = _rouge_scores(preds, self.refs)
+        model.train(was_training)
+        return results, preds, self.refs
+
+
+def _background_eval(evaluator: Evaluator, ckpt_dir: str, step: int, threads: int, out) -> None:
+    torch.set_num_threads(threads)
+    model = AutoModelForSeq2SeqLM.from_pretrained(ckpt_dir)
+    results, _, _ = evaluator.run(model, torch.device("cpu"))
+    out.put((step, ckpt_dir, results))
+
+
+class BackgroundEvaluator:
+    """
+    Runs Evaluator against saved checkpoints in a separate (spawned) process so
+    the training loop doesn't stop for generation. One evaluation runs at a time;
+    submit() only waits if the previous one is still going. A submitted
+    checkpoint stays in pending() until the trainer has consumed its result and
+    called release(), so rotation can't delete it before it is copied to best.
+    An evaluation whose process dies is logged and its checkpoint released.
+    """
+
+    def __init__(self, evaluator: Evaluator, threads: int = 2):
+        self.evaluator = evaluator
+        self.threads = threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queue = self._ctx.Queue()
+        self._running = None  # (process, ckpt_dir) of the latest evaluation
+        self._pending = set()
+        self._outstanding = set()  # submitted, result not yet returned by poll()
+        self._lock = threading.Lock()  # submit() runs on the checkpoint writer thread
+
+    def pending(self) -> List[str]:
+        """Checkpoint dirs submitted and not yet released (must not be deleted yet)."""
+        with self._lock:
+            return list(self._pending)
+
+    def release(self, ckpt_dir: str) -> None:
+        with self._lock:
+            self._pending.discard(str(ckpt_dir))
+
+    def submit(self, ckpt_dir: str, step: int) -> None:
+        ckpt_dir = str(ckpt_dir)
+        with self._lock:
+            self._pending.add(ckpt_dir)
+            self._outstanding.add(ckpt_dir)
+        if self._running is not None:
+            proc, prev = self._running
+            proc.join()
+            if proc.exitcode != 0:
+                self._lost(prev, proc.exitcode)
+        proc = self._ctx.Process(target=_background_eval, args=(self.evaluator, ckpt_dir, step, self.threads, self._queue), daemon=True)
+        try:
+            proc.start()
+        except BaseException:
+            self._lost(ckpt_dir, None)
+            raise
+        self._running = (proc, ckpt_dir)
+
+    def _lost(self, ckpt_dir: str, exitcode) -> None:
+        with self._lock:
+            if ckpt_dir not in self._outstanding:
+                return
+            self._outstanding.discard(ckpt_dir)
+            self._pending.discard(ckpt_dir)
+        tqdm.write(f"Background evaluation of {ckpt_dir} failed (exit code {exitcode}); no result for it")
+
+    def poll(self, wait: bool = False) -> List[tuple]:
+        """
+        Finished (step, ckpt_dir, results) tuples; wait=True blocks until every
+        submitted evaluation has reported back or died.
+        """
+        done = []
+        while True:
+            running = self._running
+            # Sampled before draining: a process that has exited has already flushed its result
+            finished = running is not None and running[0].exitcode is not None
+            while True:
+                try:
+                    step, ckpt_dir, results = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    self._outstanding.discard(ckpt_dir)
+                done.append((step, ckpt_dir, results))
+            if finished:
+                self._lost(running[1], running[0].exitcode)
+            with self._lock:
+                outstanding = bool(self._outstanding)
+            if not (wait and outstanding):
+                return done
+            if running is not None and not finished:
+                running[0].join(timeout=1.0)
+            else:
+                time.sleep(0.1)  # a submit() is between start() and recording the process
 
 
 def train(args):
     set_seed(args.seed)
 
-    device = torch.device("cuda" if torch.cuda.is_available() and not args.no_cuda else "cpu")
-    print("Using device:", device)
+    rank, world_size, local_rank = init_distributed(args)
+    args.rank, args.world_size = rank, world_size
+    is_main = rank == 0
+    ddp = world_size > 1
+
+    if torch.cuda.is_available() and not args.no_cuda:
+        device = torch.device("cuda", local_rank)
+        torch.cuda.set_device(device)
+    else:
+        device = torch.device("cpu")
+        # Split the cores between the processes on this machine instead of
+        # letting each one start a thread per core
+        local_procs = int(os.environ.get("LOCAL_WORLD_SIZE", "1"))
+        torch.set_num_threads(args.num_threads or max(1, (os.cpu_count() or 1) // local_procs))
+    if is_main:
+        print("Using device:", device, f"x {world_size} process(es)" if ddp else "")
 
+    resume_dir = resolve_resume(args.resume_from, args.output_dir)
     tokenizer = AutoTokenizer.from_pretrained(args.model_name, use_fast=True)
-    model = AutoModelForSeq2SeqLM.from_pretrained(args.model_name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(resume_dir or args.model_name)
     model.to(device)
+    raw_model = model
+    if ddp:
+        model = DistributedDataParallel(model, device_ids=[local_rank] if device.type == "cuda" else None)
 
-    train_dataset = InterviewDataset(args.train_file, tokenizer, max_len=args.max_source_length)
-    valid_dataset = InterviewDataset(args.valid_file, tokenizer, max_len=args.max_source_length) if args.valid_file else None
+    if ddp and args.token_cache_dir and not args.streaming:
+        # Rank 0 tokenizes into the shared cache while the others wait, then they
+        # all open it (the barrier gives up after the process group timeout, 30
+        # minutes by default; --preprocess_only builds a big cache up front)
+        if is_main:
+            build_token_cache(args.train_file, tokenizer, args.token_cache_dir, args.max_source_length, args.max_target_length)
+        dist.barrier()
+    train_dataset = load_dataset(args.train_file, tokenizer, args, streaming=args.streaming)
+    valid_dataset = load_dataset(args.valid_file, tokenizer, args) if args.valid_file and is_main else None
 
-    data_collator = DataCollatorForSeq2Seq(tokenizer, model=model, padding=True, return_tensors="pt")
+    if args.num_workers > 0:
+        # Fork-safe: the Rust tokenizer's own thread pool must not be live when workers fork
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    pin_memory = args.pin_memory and device.type == "cuda"
+    data_collator = Seq2SeqCollator(tokenizer)
 
-    train_loader = DataLoader(
+    train_collator = data_collator
+    if args.pack:
+        check_packable(raw_model)
+        train_collator = Seq2SeqPackingCollator(
+            tokenizer.pad_token_id,
+            raw_model.config.decoder_start_token_id,
+            max_len=args.max_source_length,
+            max_target_len=args.max_target_length,
+        )
+
+    batch_sampler = None
+    if args.group_by_length or args.max_tokens > 0 or args.pack:
+        if args.streaming:
+            raise ValueError("--group_by_length/--max_tokens/--pack need a map-style dataset, not --streaming")
+        batch_sampler = LengthGroupedBatchSampler(
+            train_dataset.lengths,
+            batch_size=args.batch_size,
+            max_tokens=args.max_tokens,
+            megabatch_mult=args.megabatch_mult,
+            seed=args.seed,
+            packing=args.pack,
+            rank=rank,
+            world_size=world_size,
+        )
+    elif not args.streaming:
+        # Seeded per epoch (and split by rank), so a resumed run replays the same order
+        sampler = DistributedSampler(train_dataset, num_replicas=world_size, rank=rank, shuffle=True, seed=args.seed, drop_last=ddp)
+        batch_sampler = BatchSampler(sampler, args.batch_size, drop_last=False)
+    if batch_sampler is not None:
+        batch_sampler = ResumableBatchSampler(batch_sampler)
+    # Map-style order comes from batch_sampler; a streaming dataset shuffles itself
+    train_loader = make_loader(
         train_dataset,
+        args,
+        train_collator,
         batch_size=args.batch_size,
-        shuffle=True,
-        collate_fn=lambda b: data_collator(b),
-        num_workers=0,
+        batch_sampler=batch_sampler,
+        pin_memory=pin_memory,
     )
 
-    valid_loader = None
+    evaluator = background_eval = None
     if valid_dataset:
-        valid_loader = DataLoader(valid_dataset, batch_size=args.eval_batch_size, shuffle=False, collate_fn=lambda b: data_collator(b))
+        evaluator = Evaluator(
+            valid_dataset,
+            tokenizer,
+            data_collator,
+            batch_size=args.eval_batch_size,
+            num_samples=args.eval_samples,
+            num_beams=args.eval_num_beams,
+            max_length=args.eval_max_length,
+        )
+        if args.eval_in_background:
+            background_eval = BackgroundEvaluator(evaluator, threads=args.eval_threads)
 
     # optimizer and scheduler
     no_decay = ["bias", "LayerNorm.weight"]
     optimizer_grouped_parameters = [
         {
-            "params": [p for n, p in model.named_parameters() if not any(nd in n for nd in no_decay)],
+            "params": [p for n, p in raw_model.named_parameters() if not any(nd in n for nd in no_decay)],
             "weight_decay": args.weight_decay,
         },
-        {"params": [p for n, p in model.named_parameters() if any(nd in n for nd in no_decay)], "weight_decay": 0.0},
+        {"params": [p for n, p in raw_model.named_parameters() if any(nd in n for nd in no_decay)], "weight_decay": 0.0},
     ]
     optimizer = AdamW(optimizer_grouped_parameters, lr=args.learning_rate)
 
@@ -209,80 +1407,199 @@ def train(args):
 
     global_step = 0
     best_metric = -float("inf")
+    checkpointer = Checkpointer(
+        args.output_dir,
+        tokenizer,
+        keep_last=args.save_total_limit,
+        asynchronous=not args.sync_checkpoints,
+        protect=background_eval.pending if background_eval is not None else None,
+    )
+
+    start_epoch, skip_batches = 0, 0
+    if resume_dir:
+        state = torch.load(Path(resume_dir) / "training_state.pt", map_location="cpu", weights_only=False)
+        optimizer.load_state_dict(state["optimizer"])
+        scheduler.load_state_dict(state["scheduler"])
+        scaler.load_state_dict(state["scaler"])
+        global_step = state["global_step"]
+        best_metric = state["best_metric"]
+        checkpointer.best_step = state.get("best_step")
+        start_epoch, skip_batches = state["epoch"], state["step_in_epoch"]
+        if skip_batches >= len(train_loader):
+            start_epoch, skip_batches = start_epoch + 1, 0
+        rngs = state["rng"]
+        set_rng_state(rngs[rank] if len(rngs) == world_size else rngs[0])
+        if is_main:
+            print(f"Resumed from {resume_dir}: step {global_step}, epoch {start_epoch + 1}, skipping {skip_batches} batches")
+
+    def consider_best(results, step: int, ckpt_dir: str = "") -> None:
+        nonlocal best_metric
+        metric_val = select_metric(results)
+        if metric_val is None or metric_val <= best_metric:
+            return
+        best_metric = metric_val
+        best_dir = Path(args.output_dir) / "best"
+        if ckpt_dir:
+            # Background evaluations score a saved checkpoint; the live weights have moved on
+            shutil.copytree(ckpt_dir, best_dir, dirs_exist_ok=True)
+            checkpointer.best_step = step
+        else:
+            best_dir.mkdir(parents=True, exist_ok=True)
+            raw_model.save_pretrained(best_dir)
+            tokenizer.save_pretrained(best_dir)
+        tqdm.write(f"New best model (metric={metric_val:.4f}, step {step}) saved to {best_dir}")
+
+    metrics = TrainMetrics(
+        args.metrics_file if is_main else "",
+        device,
+        start_step=global_step,
+        profile_steps=parse_profile_steps(args.profile_steps) if is_main else None,
+        trace_dir=args.output_dir,
+    )
+    train_tokens = 0
+    t_train = time.perf_counter()
 
     model.train()
-    for epoch in range(args.epochs):
-        epoch_iterator = tqdm(train_loader, desc=f"Epoch {epoch+1}/{args.epochs}")
-        for step, batch in enumerate(epoch_iterator):
-            batch = {k: v.to(device) for k, v in batch.items()}
-            with torch.cuda.amp.autocast(enabled=(device.type == "cuda" and args.fp16)):
-                outputs = model(**batch)
-                loss = outputs.loss
-                loss = loss / args.gradient_accumulation_steps
-
-            scaler.scale(loss).backward()
-
-            if (step + 1) % args.gradient_accumulation_steps == 0:
-                scaler.unscale_(optimizer)
-                torch.nn.utils.clip_grad_norm_(model.parameters(), args.max_grad_norm)
-                scaler.step(optimizer)
-                scaler.update()
-                optimizer.zero_grad()
-                scheduler.step()
+    for epoch in range(start_epoch, args.epochs):
+        # Only the resumed epoch starts part-way; its consumed batches are skipped, not loaded
+        skip = skip_batches if epoch == start_epoch else 0
+        if args.streaming:
+            train_dataset.set_epoch(epoch, start_sample=skip * args.batch_size)
+        if batch_sampler is not None:
+            batch_sampler.set_epoch(epoch, skip)
+        epoch_iterator = tqdm(train_loader, desc=f"Epoch {epoch+1}/{args.epochs}", disable=not is_main)
+        t_wait = time.perf_counter()
+        for step, batch in enumerate(epoch_iterator, start=skip):
+            # Time blocked on the loader; near zero once workers keep ahead of the step
+            data_wait = time.perf_counter() - t_wait
+            real, total = batch_token_counts(batch, tokenizer.pad_token_id)
+            metrics.add_batch(data_wait, batch_sample_count(batch), real, total)
+            train_tokens += real
+            batch = {k: v.to(device, non_blocking=pin_memory) for k, v in batch.items()}
+            boundary = (step + 1) % args.gradient_accumulation_steps == 0
+            # Between optimizer steps gradients only accumulate locally; DDP all-reduces on the boundary step
+            sync = model.no_sync() if ddp and not boundary else contextlib.nullcontext()
+            with sync:
+                with metrics.phase("forward"), torch.cuda.amp.autocast(enabled=(device.type == "cuda" and args.fp16)):
+                    outputs = model_forward(model, batch)
+                    loss = outputs.loss
+                    loss = loss / args.gradient_accumulation_steps
+
+                with metrics.phase("backward"):
+                    scaler.scale(loss).backward()
+            metrics.add_loss(loss)
+
+            if boundary:
+                with metrics.phase("optimizer"):
+                    scaler.unscale_(optimizer)
+                    torch.nn.utils.clip_grad_norm_(model.parameters(), args.max_grad_norm)
+                    scaler.step(optimizer)
+                    scaler.update()
+                    optimizer.zero_grad()
+                    scheduler.step()
                 global_step += 1
+                metrics.end_step(global_step, epoch, scheduler.get_last_lr()[0])
 
                 if global_step % args.logging_steps == 0:
-                    tqdm.write(f"Step {global_step} - loss: {loss.item() * args.gradient_accumulation_steps:.4f}")
+                    window = metrics.flush()
+                    # Loss and data wait averaged over ranks, tokens summed (global throughput)
+                    loss_sum, steps_sum, samples_sum, real_sum, padded_sum, wait_sum = all_reduce_sum(
+                        [window[k] for k in ("loss_sum", "steps", "samples", "tokens", "padded_tokens", "data_s")], device
+                    )
+                    if is_main:
+                        elapsed = window["elapsed_s"]
+                        tqdm.write(
+                            f"Step {global_step} - loss: {loss_sum / max(steps_sum, 1):.4f}"
+                            f" - samples/s: {samples_sum / max(elapsed, 1e-9):.1f}"
+                            f" - tokens/s: {real_sum / max(elapsed, 1e-9):.0f}"
+                            f" - padding: {1 - real_sum / max(padded_sum, 1):.1%}"
+                            f" - data wait: {wait_sum / world_size / max(elapsed, 1e-9):.1%}"
+                            f" - peak RSS: {_peak_rss_mb():.0f}MB"
+                        )
 
-                if args.save_steps > 0 and global_step % args.save_steps == 0:
-                    # save checkpoint
-                    ckpt_dir = Path(args.output_dir) / f"checkpoint-{global_step}"
-                    ckpt_dir.mkdir(parents=True, exist_ok=True)
-                    model.save_pretrained(ckpt_dir)
-                    tokenizer.save_pretrained(ckpt_dir)
-                    tqdm.write(f"Saved checkpoint to {ckpt_dir}")
+                # checkpoint (also the input of a background evaluation)
+                do_eval = args.valid_file and global_step % args.eval_steps == 0
+                do_save = args.save_steps > 0 and global_step % args.save_steps == 0
+                if do_save or (do_eval and args.eval_in_background):
+                    rngs = [rng_state()]
+                    if ddp:
+                        rngs = [None] * world_size
+                        dist.all_gather_object(rngs, rng_state())
+                    if is_main:
+                        on_done = None
+                        if do_eval and background_eval is not None:
+                            on_done = functools.partial(background_eval.submit, step=global_step)
+                        checkpointer.save(
+                            global_step, raw_model, optimizer, scheduler, scaler,
+                            {
+                                "global_step": global_step,
+                                "epoch": epoch,
+                                "step_in_epoch": step + 1,
+                                "best_metric": best_metric,
+                                "best_step": checkpointer.best_step,
+                                "rng": rngs,
+                            },
+                            on_done=on_done,
+                        )
 
                 # eval
-                if valid_loader is not None and global_step % args.eval_steps == 0:
-                    results, preds, refs = evaluate(model, tokenizer, valid_loader, device, num_samples=args.eval_samples)
-                    # use rougeL fmeasure if available
-                    metric_val = None
-                    if isinstance(results, dict):
-                        # evaluate returns dict like {'rouge1':..., 'rouge2':..., 'rougeL':...}
-                        # evaluate's rouge returns rouge1, rouge2, rougeL f1 scores
-                        if "rougeL" in results:
-                            # some evaluate versions return e.g. {'rouge1':0.1...}
-                            metric_val = results.get("rougeL", 0.0)
-                        elif "rougeLsum" in results:
-                            metric_val = results.get("rougeLsum", 0.0)
-                        else:
-                            # fallback
-                            metric_val = list(results.values())[0] if results else 0.0
-
-                    is_better = metric_val is not None and metric_val > best_metric
-                    if is_better:
-                        best_metric = metric_val
-                        best_dir = Path(args.output_dir) / "best"
-                        best_dir.mkdir(parents=True, exist_ok=True)
-                        model.save_pretrained(best_dir)
-                        tokenizer.save_pretrained(best_dir)
-                        tqdm.write(f"New best model (metric={metric_val:.4f}) saved to {best_dir}")
+                if evaluator is not None and background_eval is None and do_eval:
+                    results, preds, refs = evaluator.run(raw_model, device)
+                    consider_best(results, global_step)
+                if background_eval is not None:
+                    for step_done, ckpt_done, results in background_eval.poll():
+                        consider_best(results, step_done, ckpt_done)
+                        background_eval.release(ckpt_done)
+                if ddp and do_eval and not args.eval_in_background:
+                    dist.barrier()  # the other ranks wait for rank 0's evaluation
 
             if args.max_steps > 0 and global_step >= args.max_steps:
                 break
+            t_wait = time.perf_counter()
 
         if args.max_steps > 0 and global_step >= args.max_steps:
             break
 
-    # final save
-    final_dir = Path(args.output_dir) / "final"
-    final_dir.mkdir(parents=True, exist_ok=True)
-    model.save_pretrained(final_dir)
-    tokenizer.save_pretrained(final_dir)
-    print("Training complete. Final model saved to:", final_dir)
+    train_secs = time.perf_counter() - t_train
+    metrics.close()
+    checkpointer.wait()
+    if is_main and checkpointer.saves:
+        print(
+            f"Checkpointing: {checkpointer.saves} save(s) blocked training for {checkpointer.blocked_s:.2f}s"
+            f" ({checkpointer.blocked_s / checkpointer.saves:.2f}s each, {'sync' if args.sync_checkpoints else 'async'})"
+        )
+    if background_eval is not None:
+        for step_done, ckpt_done, results in background_eval.poll(wait=True):
+            consider_best(results, step_done, ckpt_done)
+            background_eval.release(ckpt_done)
+    (tokens_sum,) = all_reduce_sum([train_tokens], device)
+    if is_main:
+        print(f"Train throughput: {tokens_sum / max(train_secs, 1e-9):.0f} tokens/s over {world_size} process(es) in {train_secs:.1f}s")
+
+        # final save
+        final_dir = Path(args.output_dir) / "final"
+        final_dir.mkdir(parents=True, exist_ok=True)
+        raw_model.save_pretrained(final_dir)
+        tokenizer.save_pretrained(final_dir)
+        print("Training complete. Final model saved to:", final_dir)
+    if ddp:
+        dist.destroy_process_group()
+
+
+def preprocess(args):
+    """Builds the token caches (or, with --streaming, the shard line indexes) and exits (--preprocess_only)."""
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name, use_fast=True)
+    if args.streaming:
+        # Only the line indexes are prepared; streamed shards are tokenized on the fly
+        for path in expand_shards(args.train_file):
+            print(f"Line index for {path}: {len(_line_index(path, args.token_cache_dir))} records")
+        return
+    for path in filter(None, [args.train_file, args.valid_file]):
+        cache = build_token_cache(path, tokenizer, args.token_cache_dir, args.max_source_length, args.max_target_length)
+        print(f"Token cache for {path}: {cache}")
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--model_name", type=str, default="t5-small")
     parser.add_argument("--train_file", type=str, required=True)
@@ -295,6 +1612,21 @@ if _name_ == "_main_":
     parser.add_argument("--weight_decay", type=float, default=0.01)
     parser.add_argument("--warmup_ratio", type=float, default=0.06)
     parser.add_argument("--max_source_length", type=int, default=512)
+    parser.add_argument("--max_target_length", type=int, default=128)
+    parser.add_argument("--token_cache_dir", type=str, default="", help="pre-tokenize into memory-mapped arrays here and train from them")
+    parser.add_argument("--streaming", action="store_true", help="stream --train_file JSONL shards (comma list or glob) instead of loading them")
+    parser.add_argument("--shuffle_buffer", type=int, default=10000, help="records per shuffle window in --streaming mode")
+    parser.add_argument("--group_by_length", action="store_true", help="batch samples of similar length (sorted within shuffled megabatches)")
+    parser.add_argument("--max_tokens", type=int, default=0, help="token budget per batch instead of a fixed --batch_size (implies --group_by_length)")
+    parser.add_argument("--megabatch_mult", type=int, default=50, help="megabatch size in batches for --group_by_length")
+    parser.add_argument("--pack", action="store_true", help="pack short examples into shared rows with block-diagonal masks (T5/mT5 models)")
+    parser.add_argument("--num_workers", type=int, default=0, help="DataLoader worker processes (tokenize/collate off the training thread)")
+    parser.add_argument("--prefetch_factor", type=int, default=2, help="batches prepared ahead per worker")
+    parser.add_argument("--pin_memory", action="store_true", help="pin host batches for async copies to the GPU")
+    parser.add_argument("--persistent_workers", action="store_true", help="keep workers alive between epochs")
+    parser.add_argument("--ddp_backend", type=str, default="gloo", help="torch.distributed backend when launched with torchrun")
+    parser.add_argument("--num_threads", type=int, default=0, help="intra-op threads per process (default: cores / local processes)")
+    parser.add_argument("--preprocess_only", action="store_true", help="build the --token_cache_dir caches and exit")
     parser.add_argument("--gradient_accumulation_steps", type=int, default=1)
     parser.add_argument("--fp16", action="store_true")
     parser.add_argument("--seed", type=int, default=42)
@@ -302,10 +1634,24 @@ if _name_ == "_main_":
     parser.add_argument("--save_steps", type=int, default=500)
     parser.add_argument("--eval_steps", type=int, default=500)
     parser.add_argument("--eval_samples", type=int, default=200)
+    parser.add_argument("--eval_num_beams", type=int, default=4)
+    parser.add_argument("--eval_max_length", type=int, default=128, help="max generated tokens during evaluation")
+    parser.add_argument("--eval_in_background", action="store_true", help="evaluate saved checkpoints in a separate process")
+    parser.add_argument("--eval_threads", type=int, default=2, help="torch threads for the background evaluation process")
     parser.add_argument("--logging_steps", type=int, default=50)
+    parser.add_argument("--metrics_file", type=str, default="", help="per-step training metrics as .jsonl or .csv")
+    parser.add_argument("--profile_steps", type=str, default="", help="torch.profiler window a:b (optimizer steps); trace goes to --output_dir")
     parser.add_argument("--max_grad_norm", type=float, default=1.0)
     parser.add_argument("--max_steps", type=int, default=-1)
+    parser.add_argument("--save_total_limit", type=int, default=3, help="keep this many latest checkpoints (plus the best); 0 keeps all")
+    parser.add_argument("--sync_checkpoints", action="store_true", help="write checkpoints on the training thread (for comparison)")
+    parser.add_argument("--resume_from", type=str, default="", help="checkpoint dir to resume from, or 'latest' in --output_dir")
 
     args = parser.parse_args()
-    os.makedirs(args.output_dir, exist_ok=True)
-    train(args)
\ No newline at end of file
+    if args.preprocess_only:
+        if not args.token_cache_dir:
+            parser.error("--preprocess_only needs --token_cache_dir")
+        preprocess(args)
+    else:
+        os.makedirs(args.output_dir, exist_ok=True)
+        train(args)
\ No newline at end of file
@@ -2,15 +2,33 @@
 # Uses BART (via Hugging Face) for abstractive summaries with safe chunking.
 # Falls back to the old extractive method if transformers/BART aren't available.
 
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Union
 import re
+import os
+import bisect
+import multiprocessing
+import heapq
+import itertools
+import json
+import hashlib
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import math
+import time
+import pickle
+import threading
+from array import array
 
 # --- lightweight deps kept from your original ---
 from rake_nltk import Rake
+from nltk.tokenize import wordpunct_tokenize
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+import scipy.sparse as sp
+
+import summariser_metrics as metrics
+from summary_cache import SummaryCache, make_key
 
 # Optional fallback extractive summarizer (only if transformers is missing or fails)
 try:
@@ -28,57 +46,227 @@ except Exception:
 
 
 # ---------------- Utilities ----------------
+_WS_RE = re.compile(r"\s+")
+_SENT_SPLIT_RE = re.compile(r"(?<=[.?!])\s+")
+
+
 def clean_text(text: str) -> str:
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WS_RE.sub(" ", text).strip()
     return text
 
 
+def split_sentences(text: str) -> List[str]:
+    return _SENT_SPLIT_RE.split(text)
+
+
+class Transcript:
+    """
+    One input text, prepared once and shared by every analysis stage:
+    the cleaned text, sentence spans as start/end offset arrays (sentences are
+    sliced on demand, never stored), the word count, and token IDs + offsets
+    per tokenizer, encoded on first use.
+    """
+
+    __slots__ = ("text", "starts", "ends", "word_count", "_encodings")
+
+    def __init__(self, text: str, cleaned: bool = False):
+        self.text = text if cleaned else clean_text(text)
+        self.starts = array("i")
+        self.ends = array("i")
+        if self.text:
+            # Same boundaries as re.split(r"(?<=[.?!])\s+", text), as offsets
+            pos = 0
+            for m in _SENT_SPLIT_RE.finditer(self.text):
+                self.starts.append(pos)
+                self.ends.append(m.start())
+                pos = m.end()
+            self.starts.append(pos)
+            self.ends.append(len(self.text))
+        self.word_count = len(self.text.split())
+        self._encodings: Dict[str, Dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def sentence(self, i: int) -> str:
+        return self.text[self.starts[i] : self.ends[i]]
+
+    def sentences(self) -> Iterator[str]:
+        text = self.text
+        for a, b in zip(self.starts, self.ends):
+            yield text[a:b]
+
+    def sentence_token_counts(self, tokenizer) -> "np.ndarray":
+        """Tokens per sentence, attributed from the cached encoding's offsets."""
+        offsets = self.encoding(tokenizer)["offset_mapping"]
+        tok_starts = np.fromiter((a for a, _ in offsets), dtype=np.int64, count=len(offsets))
+        owner = np.searchsorted(np.frombuffer(self.starts, dtype=np.intc), tok_starts, side="right") - 1
+        return np.bincount(np.clip(owner, 0, None), minlength=len(self))[: len(self)]
+
+    def encoding(self, tokenizer) -> Dict:
+        """input_ids + offset_mapping (no special tokens), cached per tokenizer."""
+        key = getattr(tokenizer, "name_or_path", "") or str(id(tokenizer))
+        if key not in self._encodings:
+            with metrics.stage("tokenize"):
+                self._encodings[key] = tokenizer(
+                    self.text,
+                    return_tensors=None,
+                    truncation=False,
+                    add_special_tokens=False,
+                    return_offsets_mapping=True,
+                )
+            metrics.count(tokens_in=len(self._encodings[key]["input_ids"]))
+        return self._encodings[key]
+
+
+def _as_transcript(text) -> Transcript:
+    return text if isinstance(text, Transcript) else Transcript(text)
+
+
+# ---------------- Result cache ----------------
+# Whole analyse_meeting results and individual chunk summaries, keyed on content
+# hashes plus model/params. Memory-only by default; configure_cache(path=...) adds
+# the on-disk tier.
+_CACHE = SummaryCache(max_items=1024)
+
+
+def configure_cache(max_items: int = 1024, path: str = None, max_disk_bytes: int = 256 * 1024 * 1024):
+    """Replaces the module cache (e.g. to add an SQLite file). Returns the new cache."""
+    global _CACHE
+    _CACHE = SummaryCache(max_items=max_items, path=path, max_disk_bytes=max_disk_bytes)
+    return _CACHE
+
+
+def _cached_summarize(summarize, scope: tuple):
+    """
+    Wraps a summarize(chunks) callable with per-chunk caching: only chunks not
+    seen before (for this model/params scope) reach the model. A transcript that
+    gained a few lines reuses the summaries of its unchanged leading chunks.
+    """
+    def run(chunks: List) -> List[str]:
+        keys = [make_key(*scope, c) for c in chunks]
+        results = [_CACHE.get(k) for k in keys]
+        miss = [i for i, r in enumerate(results) if r is None]
+        if miss:
+            for i, s in zip(miss, summarize([chunks[i] for i in miss])):
+                results[i] = s
+                _CACHE.set(keys[i], s)
+        return results
+
+    return run
+
+
 # ---------------- BART Summarizer ----------------
-_SUMMARIZER = None
-_TOKENIZER = None
+BACKENDS = ("torch", "int8", "onnx")
+_SUMMARIZERS: Dict[tuple, tuple] = {}  # (model_name, backend) -> (pipeline, tokenizer)
+_TOKENIZERS: Dict[str, object] = {}
+_POOL_MODEL_NAME = None
+_POOL_BACKEND = "torch"
+# Exported / quantized model artifacts, built once by export_backend()
+_ARTIFACT_DIR = os.environ.get("MEETSUM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "meetsum"))
+
+
+def _artifact_path(model_name: str, backend: str) -> str:
+    return os.path.join(_ARTIFACT_DIR, model_name.replace("/", "--") + "-" + backend)
 
-def _load_bart(model_name: str = "facebook/bart-large-cnn"):
+
+def export_backend(model_name: str = "facebook/bart-large-cnn", backend: str = "int8") -> str:
     """
-    Lazy-loads a BART summarization pipeline.
-    You can swap to a smaller model like 'sshleifer/distilbart-cnn-12-6' if needed.
+    One-time export for the CPU backends; returns the artifact directory.
+    - int8: dynamically int8-quantized nn.Linear layers, saved with torch.save
+    - onnx: ONNX Runtime encoder/decoder export with KV-cache (needs optimum[onnxruntime])
+    Reuses an earlier export when present. "torch" needs no export.
     """
-    global _SUMMARIZER, _TOKENIZER
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}. Choose from {BACKENDS}.")
+    if backend == "torch":
+        return model_name
+    if not _TRANS_AVAILABLE:
+        raise RuntimeError("transformers/torch not available for BART summarization.")
+
+    path = _artifact_path(model_name, backend)
+    done = os.path.join(path, "EXPORT_DONE")
+    if os.path.exists(done):
+        return path
+    os.makedirs(path, exist_ok=True)
 
-    if _SUMMARIZER is not None:
-        return _SUMMARIZER, _TOKENIZER
+    if backend == "int8":
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name).eval()
+        qmodel = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        torch.save(qmodel, os.path.join(path, "model_int8.pt"))
+    else:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True).save_pretrained(path)
+    AutoTokenizer.from_pretrained(model_name, use_fast=True).save_pretrained(path)
+    # Written last, so a half-finished export is redone rather than loaded
+    open(done, "w").close()
+    return path
+
+
+def _load_bart(model_name: str = "facebook/bart-large-cnn", backend: str = "torch"):
+    """
+    Lazy-loads a BART summarization pipeline, once per (model, backend).
+    You can swap to a smaller model like 'sshleifer/distilbart-cnn-12-6' if needed.
+    backend: "torch" (fp32, today's default), "int8" (dynamic quantization, CPU)
+    or "onnx" (ONNX Runtime with KV-cache, CPU); the last two export on first use.
+    """
+    key = (model_name, backend)
+    if key in _SUMMARIZERS:
+        return _SUMMARIZERS[key]
 
     if not _TRANS_AVAILABLE:
         raise RuntimeError("transformers/torch not available for BART summarization.")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}. Choose from {BACKENDS}.")
 
-    # Choose device: CUDA if available, else CPU
-    device = 0 if torch.cuda.is_available() else -1
+    with metrics.stage("model_load"):
+        if backend == "torch":
+            # Choose device: CUDA if available, else CPU
+            device = 0 if torch.cuda.is_available() else -1
+            tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        else:
+            device = -1
+            path = export_backend(model_name, backend)
+            tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+            if backend == "int8":
+                model = torch.load(os.path.join(path, "model_int8.pt"), weights_only=False)
+            else:
+                from optimum.onnxruntime import ORTModelForSeq2SeqLM
 
-    _TOKENIZER = AutoTokenizer.from_pretrained(model_name, use_fast=True)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-    _SUMMARIZER = pipeline(
-        "summarization",
-        model=model,
-        tokenizer=_TOKENIZER,
-        device=device,
-    )
-    return _SUMMARIZER, _TOKENIZER
+                model = ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True)
+
+        summarizer = pipeline(
+            "summarization",
+            model=model,
+            tokenizer=tokenizer,
+            device=device,
+        )
+    _SUMMARIZERS[key] = (summarizer, tokenizer)
+    return _SUMMARIZERS[key]
 
 
-def _chunk_by_tokens(text: str, tokenizer, max_tokens: int = 950, overlap: int = 50) -> List[str]:
+def _load_tokenizer(model_name: str = "facebook/bart-large-cnn"):
+    """Tokenizer only (no model weights), for processes that just chunk text."""
+    if model_name not in _TOKENIZERS:
+        if not _TRANS_AVAILABLE:
+            raise RuntimeError("transformers/torch not available for BART summarization.")
+        _TOKENIZERS[model_name] = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    return _TOKENIZERS[model_name]
+
+
+def _chunk_by_tokens(text: Union[str, Transcript], tokenizer, max_tokens: int = 950, overlap: int = 50) -> List[str]:
     """
     Splits text into overlapping token chunks safe for BART (max input ~1024 tokens).
     Uses tokenizer to avoid breaking mid-token. Returns decoded chunks.
     """
-    # Encode once
-    ids = tokenizer(
-        text,
-        return_tensors=None,
-        truncation=False,
-        add_special_tokens=False
-    )["input_ids"]
+    # Encode once (a Transcript keeps the encoding for the next caller)
+    doc = _as_transcript(text)
+    ids = doc.encoding(tokenizer)["input_ids"]
 
     if len(ids) <= max_tokens:
-        return [text]
+        return [doc.text]
 
     chunks = []
     start = 0
@@ -96,76 +284,521 @@ def _chunk_by_tokens(text: str, tokenizer, max_tokens: int = 950, overlap: int =
     return chunks
 
 
+def _chunk_token_ids(text: Union[str, Transcript], tokenizer, max_tokens: int = 950, overlap: int = 50) -> List[List[int]]:
+    """
+    Token-ID version of _chunk_by_tokens: encodes once and returns the ID windows
+    themselves (no decode / clean / re-encode). Windows end on a sentence boundary
+    when one falls in the back half of the window, found from the tokenizer's
+    offset mapping, and the next window starts at the first sentence inside the
+    last `overlap` tokens (plain token overlap if there is none).
+    """
+    doc = _as_transcript(text)
+    enc = doc.encoding(tokenizer)
+    ids = enc["input_ids"]
+    n = len(ids)
+    if n <= max_tokens:
+        return [ids]
+
+    # Token index just past every token that ends one of the Transcript's sentences
+    sent_ends = set(doc.ends)
+    bounds = [i + 1 for i, (_, e) in enumerate(enc["offset_mapping"]) if e in sent_ends]
+
+    chunks = []
+    start = 0
+    while start < n:
+        end = min(start + max_tokens, n)
+        if end < n:
+            j = bisect.bisect_right(bounds, end) - 1
+            if j >= 0 and bounds[j] > start + max_tokens // 2:
+                end = bounds[j]
+        chunks.append(ids[start:end])
+        if end == n:
+            break
+        j = bisect.bisect_left(bounds, end - overlap)
+        nxt = bounds[j] if j < len(bounds) and bounds[j] < end else end - overlap
+        start = max(nxt, start + 1)
+    return chunks
+
+
+def _length_bounds(max_summary_words: int):
+    # Convert desired max words to approx tokens (heuristic ~1.3 words/token)
+    # We'll set max_length in tokens for BART
+    approx_tokens = max(56, min(220, int(max_summary_words / 0.75)))  # keep in sane bounds
+    min_tokens = max(32, int(approx_tokens * 0.5))
+    return approx_tokens, min_tokens
+
+
+def _generate_batched(
+    ids: List[List[int]],
+    model,
+    tokenizer,
+    max_length: int,
+    min_length: int,
+    batch_size: int,
+    num_beams: int = None,
+) -> List[str]:
+    """
+    Runs encoded inputs (special tokens included) through model.generate in
+    length-sorted batches and returns cleaned summaries in input order.
+    num_beams overrides the model's default (e.g. 1 = greedy).
+    """
+    extra = {} if num_beams is None else {"num_beams": num_beams}
+    # Longest first: the first batch surfaces OOM early and padding stays minimal
+    order = sorted(range(len(ids)), key=lambda i: len(ids[i]), reverse=True)
+    results: List[str] = [""] * len(ids)
+    for b in range(0, len(order), max(1, batch_size)):
+        idx = order[b : b + max(1, batch_size)]
+        batch = tokenizer.pad(
+            {"input_ids": [ids[i] for i in idx], "attention_mask": [[1] * len(ids[i]) for i in idx]},
+            return_tensors="pt",
+        )
+        batch = {k: v.to(model.device) for k, v in batch.items()}
+        with metrics.stage("generate"), torch.no_grad():
+            out = model.generate(
+                **batch,
+                max_length=max_length,
+                min_length=min_length,
+                do_sample=False,
+                **extra,
+            )
+        if metrics.current_run() is not None:
+            metrics.count(tokens_out=int((out != tokenizer.pad_token_id).sum()))
+        decoded = tokenizer.batch_decode(out, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+        for i, s in zip(idx, decoded):
+            results[i] = clean_text(s)
+    return results
+
+
+def _summarize_texts(
+    texts: List[str],
+    summarizer,
+    max_length: int,
+    min_length: int,
+    batch_size: int = 8,
+    num_beams: int = None,
+) -> List[str]:
+    """
+    Summarizes many inputs and returns one cleaned summary per input, in input order.
+    batch_size <= 1 keeps the old one-pipeline-call-per-text path. Otherwise all
+    texts are tokenized once, sorted by length (so batches carry little padding)
+    and run through model.generate together with the same generation settings
+    the pipeline would use, so the summaries match the sequential path.
+    """
+    if not texts:
+        return []
+
+    if batch_size <= 1:
+        extra = {} if num_beams is None else {"num_beams": num_beams}
+        results = []
+        for t in texts:
+            # Hugging Face summarization pipeline uses max_length/min_length in tokens (not words)
+            with metrics.stage("generate"):
+                out = summarizer(
+                    t,
+                    truncation=True,
+                    max_length=max_length,
+                    min_length=min_length,
+                    do_sample=False,
+                    **extra,
+                )
+            results.append(clean_text(out[0]["summary_text"]))
+        return results
+
+    model, tokenizer = summarizer.model, summarizer.tokenizer
+    # Same prefix handling as the summarization pipeline (e.g. "summarize: " for T5)
+    prefix = getattr(model.config, "prefix", None) or ""
+    ids = tokenizer(
+        [prefix + t for t in texts],
+        truncation=True,
+        padding=False,
+        return_tensors=None,
+    )["input_ids"]
+    return _generate_batched(ids, model, tokenizer, max_length, min_length, batch_size, num_beams)
+
+
+def _summarize_ids(
+    id_chunks: List[List[int]],
+    summarizer,
+    max_length: int,
+    min_length: int,
+    batch_size: int = 8,
+    num_beams: int = None,
+) -> List[str]:
+    """
+    Like _summarize_texts, but for chunks that are already token IDs (from
+    _chunk_token_ids). Adds the model prefix and special tokens, truncates to the
+    model limit and generates directly, so the chunk text is never re-tokenized.
+    """
+    if not id_chunks:
+        return []
+
+    model, tokenizer = summarizer.model, summarizer.tokenizer
+    prefix = getattr(model.config, "prefix", None) or ""
+    prefix_ids = tokenizer(prefix, add_special_tokens=False)["input_ids"] if prefix else []
+    limit = tokenizer.model_max_length
+    if not limit or limit > 100_000:  # "unbounded" sentinel on some tokenizers
+        limit = getattr(model.config, "max_position_embeddings", 1024)
+    limit -= tokenizer.num_special_tokens_to_add(pair=False)
+
+    ids = [tokenizer.build_inputs_with_special_tokens((prefix_ids + c)[:limit]) for c in id_chunks]
+    return _generate_batched(ids, model, tokenizer, max_length, min_length, batch_size, num_beams)
+
+
+# ---------------- Map-reduce driver ----------------
+_MAP_POOL = None
+_MAP_POOL_KEY = None
+
+
+def _pool_init(model_name: str, backend: str, threads: int):
+    # Runs once in every worker: pin its torch threads and load its own model replica
+    global _POOL_MODEL_NAME, _POOL_BACKEND
+    torch.set_num_threads(threads)
+    _POOL_MODEL_NAME, _POOL_BACKEND = model_name, backend
+    _load_bart(model_name, backend)
+
+
+def _pool_summarize(job):
+    # Returns (summaries, exported metrics or None); the caller merges the metrics
+    token_chunking, items, max_length, min_length, batch_size, num_beams, collect = job
+    summarizer, _ = _load_bart(_POOL_MODEL_NAME, _POOL_BACKEND)
+    summarize = _summarize_ids if token_chunking else _summarize_texts
+    if not collect:
+        return summarize(items, summarizer, max_length, min_length, batch_size, num_beams), None
+    with metrics.collect("pool") as run:
+        out = summarize(items, summarizer, max_length, min_length, batch_size, num_beams)
+    return out, run.export()
+
+
+def _get_map_pool(model_name: str, workers: int, backend: str = "torch"):
+    """
+    Process pool of CPU model replicas, kept alive between calls (each worker pays
+    the model load once). Torch threads are split evenly across the workers.
+    """
+    global _MAP_POOL, _MAP_POOL_KEY
+    key = (model_name, backend, workers)
+    if _MAP_POOL is not None and _MAP_POOL_KEY == key:
+        return _MAP_POOL
+    shutdown_map_pool()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    _MAP_POOL = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),  # fork + torch threads can deadlock
+        initializer=_pool_init,
+        initargs=(model_name, backend, threads),
+    )
+    _MAP_POOL_KEY = key
+    return _MAP_POOL
+
+
+def shutdown_map_pool():
+    """Stops the map-phase worker pool (if any) and frees its model replicas."""
+    global _MAP_POOL, _MAP_POOL_KEY
+    if _MAP_POOL is not None:
+        _MAP_POOL.shutdown(wait=True)
+    _MAP_POOL, _MAP_POOL_KEY = None, None
+
+
+def _pool_summarizer(
+    model_name: str,
+    backend: str,
+    workers: int,
+    token_chunking: bool,
+    max_length: int,
+    min_length: int,
+    batch_size: int,
+    num_beams: int = None,
+):
+    """
+    Returns a summarize(chunks) callable that spreads length-sorted jobs over the
+    worker pool and puts results back in order. Jobs hold at most batch_size
+    chunks, fewer when that is needed to give every worker one (a short
+    transcript, or a late reduce level, still uses the whole pool).
+    """
+    pool = _get_map_pool(model_name, workers, backend)
+
+    def summarize(chunks: List) -> List[str]:
+        order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]), reverse=True)
+        size = max(1, min(batch_size, math.ceil(len(chunks) / workers)))
+        collect = metrics.current_run() is not None  # workers send back generate time and tokens_out
+        jobs = [
+            (token_chunking, [chunks[i] for i in order[b : b + size]], max_length, min_length, batch_size, num_beams, collect)
+            for b in range(0, len(order), size)
+        ]
+        flat = []
+        for part, record in pool.map(_pool_summarize, jobs):
+            flat.extend(part)
+            metrics.merge(record)
+        results: List[str] = [""] * len(chunks)
+        for i, s in zip(order, flat):
+            results[i] = s
+        return results
+
+    return summarize
+
+
+def _map_reduce(
+    docs: Dict[int, Transcript],
+    tokenizer,
+    chunker,
+    summarize,
+    max_input_tokens: int,
+    overlap: int,
+    fan_in: int,
+    second_pass: bool,
+) -> Dict[int, str]:
+    """
+    Map: summarize every chunk of every doc in one summarize() call.
+    Reduce: while a doc's joined summaries don't fit in max_input_tokens, summarize
+    them again fan_in at a time; then (second_pass) one final pass over the result.
+    Every level batches all docs that still need reducing.
+    """
+    fan_in = max(2, fan_in)
+
+    # 1) Map
+    chunks: List = []
+    owners: List[int] = []
+    for i, text in docs.items():
+        cs = chunker(text, tokenizer, max_tokens=max_input_tokens, overlap=overlap)
+        chunks.extend(cs)
+        owners.extend([i] * len(cs))
+    metrics.count(chunks=len(chunks))
+    pieces: Dict[int, List[str]] = {i: [] for i in docs}
+    for i, s in zip(owners, summarize(chunks)):
+        pieces[i].append(s)
+
+    if not second_pass:
+        return {i: clean_text(" ".join(ps)) for i, ps in pieces.items()}
+    multi = [i for i, ps in pieces.items() if len(ps) > 1]
+
+    # 2) Reduce until every doc fits in one window
+    while True:
+        groups: List = []
+        owners = []
+        for i in multi:
+            ps = pieces[i]
+            if len(ps) < 2:
+                continue
+            joined = " ".join(ps)
+            if len(tokenizer(joined, add_special_tokens=False)["input_ids"]) <= max_input_tokens:
+                continue
+            for k in range(0, len(ps), fan_in):
+                cs = chunker(" ".join(ps[k : k + fan_in]), tokenizer, max_tokens=max_input_tokens, overlap=overlap)
+                groups.extend(cs)
+                owners.extend([i] * len(cs))
+        if not groups:
+            break
+        metrics.count(reduce_chunks=len(groups))
+        reduced: Dict[int, List[str]] = {}
+        for i, s in zip(owners, summarize(groups)):
+            reduced.setdefault(i, []).append(s)
+        shrunk = False
+        for i, rs in reduced.items():
+            shrunk = shrunk or len(rs) < len(pieces[i])
+            pieces[i] = rs
+        if not shrunk:  # fan-in can't make progress (tiny max_input_tokens); stop here
+            break
+
+    # 3) Final pass to tighten each multi-chunk summary
+    finals: List = []
+    owners = []
+    for i in multi:
+        cs = chunker(" ".join(pieces[i]), tokenizer, max_tokens=max_input_tokens, overlap=overlap)
+        finals.extend(cs)
+        owners.extend([i] * len(cs))
+    final_bits: Dict[int, List[str]] = {}
+    for i, s in zip(owners, summarize(finals)):
+        final_bits.setdefault(i, []).append(s)
+    for i, bits in final_bits.items():
+        pieces[i] = bits
+    return {i: clean_text(" ".join(ps)) for i, ps in pieces.items()}
+
+
+@metrics.timed("bart_summaries", top=True)
+def bart_summaries(
+    texts: List[Union[str, Transcript]],
+    model_name: str = "facebook/bart-large-cnn",
+    max_summary_words: int = 140,
+    max_input_tokens: int = 950,
+    chunk_overlap_tokens: int = 50,
+    second_pass: bool = True,
+    batch_size: int = 8,
+    token_chunking: bool = True,
+    fan_in: int = 4,
+    workers: int = 0,
+    use_cache: bool = True,
+    backend: str = "torch",
+    num_beams: int = None,
+    compression: float = None,
+) -> List[str]:
+    """
+    Batched version of bart_summary for several transcripts at once.
+    Chunks from every transcript share the same length-sorted generate batches,
+    for the map step and for every reduce level.
+    workers > 0 runs generation on a pool of that many CPU model replicas.
+    use_cache reuses cached summaries of chunks (and reduce groups) seen before.
+    backend picks the inference runtime (see _load_bart); num_beams overrides the
+    model's beam count (1 = greedy). compression (e.g. 0.5) first keeps only the
+    most salient sentences worth that share of tokens (see salience_prefilter).
+    """
+    docs = [_as_transcript(t) for t in texts]
+    results = [d.text for d in docs]
+    todo = {i: d for i, d in enumerate(docs) if d.word_count >= 40}
+    if not todo:
+        return results  # all too short; return as-is
+
+    approx_tokens, min_tokens = _length_bounds(max_summary_words)
+    chunker = _chunk_token_ids if token_chunking else _chunk_by_tokens
+
+    if workers > 0:
+        tokenizer = _load_tokenizer(model_name)  # the parent only chunks; models live in the workers
+        summarize = _pool_summarizer(
+            model_name, backend, workers, token_chunking, approx_tokens, min_tokens, batch_size, num_beams
+        )
+    else:
+        summarizer, tokenizer = _load_bart(model_name, backend)
+        run = _summarize_ids if token_chunking else _summarize_texts
+
+        def summarize(chunks: List) -> List[str]:
+            return run(chunks, summarizer, approx_tokens, min_tokens, batch_size, num_beams)
+
+    if compression is not None and compression < 1.0:
+        todo = {i: salience_prefilter(d, tokenizer, ratio=compression) for i, d in todo.items()}
+
+    if use_cache and _CACHE is not None:
+        summarize = _cached_summarize(
+            summarize, ("chunk", model_name, backend, approx_tokens, min_tokens, token_chunking, num_beams)
+        )
+
+    out = _map_reduce(todo, tokenizer, chunker, summarize, max_input_tokens, chunk_overlap_tokens, fan_in, second_pass)
+    for i, s in out.items():
+        results[i] = s
+    return results
+
+
 def bart_summary(
-    text: str,
+    text: Union[str, Transcript],
     model_name: str = "facebook/bart-large-cnn",
     max_summary_words: int = 140,
     max_input_tokens: int = 950,
     chunk_overlap_tokens: int = 50,
     second_pass: bool = True,
+    batch_size: int = 8,
+    token_chunking: bool = True,
+    fan_in: int = 4,
+    workers: int = 0,
+    use_cache: bool = True,
+    backend: str = "torch",
+    num_beams: int = None,
+    compression: float = None,
 ) -> str:
     """
     Robust BART summarization:
-    1) Token-aware chunking of long inputs
-    2) Summarize each chunk
-    3) Optionally second-pass summarize the concatenated chunk summaries
+    1) Token-aware chunking of long inputs (sentence-aligned ID windows fed straight
+       to the model; token_chunking=False uses the old decoded-text chunks)
+    2) Summarize each chunk (batch_size chunks per generate call; 1 = one call per chunk),
+       across `workers` model replicas if > 0
+    3) Optionally reduce: re-summarize fan_in summaries at a time until they fit in
+       one window, then second-pass summarize the result
+    backend: "torch" (fp32), "int8" or "onnx" CPU inference (see _load_bart)
+    num_beams: override the model's beam count (1 = greedy, much cheaper)
+    compression: keep only the most salient sentences worth this share of the
+    tokens before chunking (fewer chunks, less generation)
     """
-    text = clean_text(text)
-    if not text or len(text.split()) < 40:
-        return text  # too short; return as-is
+    return bart_summaries(
+        [text],
+        model_name=model_name,
+        max_summary_words=max_summary_words,
+        max_input_tokens=max_input_tokens,
+        chunk_overlap_tokens=chunk_overlap_tokens,
+        second_pass=second_pass,
+        batch_size=batch_size,
+        token_chunking=token_chunking,
+        fan_in=fan_in,
+        workers=workers,
+        use_cache=use_cache,
+        backend=backend,
+        num_beams=num_beams,
+        compression=compression,
+    )[0]
 
-    summarizer, tokenizer = _load_bart(model_name)
 
-    # 1) Chunk source text
-    chunks = _chunk_by_tokens(text, tokenizer, max_tokens=max_input_tokens, overlap=chunk_overlap_tokens)
+# ---------------- Shared analyzers ----------------
+# Built once per process instead of per call. Rake keeps per-extraction state on
+# the instance, so each thread gets its own (sharing one stopword list); VADER's
+# polarity_scores and a fitted TfidfVectorizer's transform are read-only.
+_ANALYZER_LOCK = threading.Lock()
+_RAKE_LOCAL = threading.local()
+_STOPWORDS = None
+_VADER = None
+_TOPIC_IDF = None  # optional corpus-fitted TfidfVectorizer for topic_ngrams
+_TOPIC_IDF_BLOB = None  # its pickle, shipped to process-pool workers
+_TOPIC_IDF_ID = None  # hash of its pickle, part of the analyse_meeting cache key
 
-    # 2) Summarize each chunk
-    chunk_summaries: List[str] = []
-    # Convert desired max words to approx tokens (heuristic ~1.3 words/token)
-    # We'll set max_length in tokens for BART
-    approx_tokens = max(56, min(220, int(max_summary_words / 0.75)))  # keep in sane bounds
-    min_tokens = max(32, int(approx_tokens * 0.5))
 
-    for c in chunks:
-        # Hugging Face summarization pipeline uses max_length/min_length in tokens (not words)
-        out = summarizer(
-            c,
-            truncation=True,
-            max_length=approx_tokens,
-            min_length=min_tokens,
-            do_sample=False,
-        )
-        chunk_summaries.append(clean_text(out[0]["summary_text"]))
-
-    combined = " ".join(chunk_summaries)
-    combined = clean_text(combined)
-
-    if not second_pass or len(chunks) == 1:
-        return combined
-
-    # 3) Second pass to tighten the final summary
-    # Re-chunk if still too long
-    chunks2 = _chunk_by_tokens(combined, tokenizer, max_tokens=max_input_tokens, overlap=chunk_overlap_tokens)
-    final_bits: List[str] = []
-    for c in chunks2:
-        out = summarizer(
-            c,
-            truncation=True,
-            max_length=approx_tokens,
-            min_length=min_tokens,
-            do_sample=False,
-        )
-        final_bits.append(clean_text(out[0]["summary_text"]))
-    final = clean_text(" ".join(final_bits))
-    return final
+def _get_rake() -> Rake:
+    global _STOPWORDS
+    r = getattr(_RAKE_LOCAL, "rake", None)
+    if r is None:
+        with _ANALYZER_LOCK:
+            if _STOPWORDS is None:
+                _STOPWORDS = Rake().stopwords  # uses NLTK stopwords; will auto-download at first run
+        r = _RAKE_LOCAL.rake = Rake(stopwords=_STOPWORDS)
+    return r
+
+
+def _get_vader() -> SentimentIntensityAnalyzer:
+    global _VADER
+    if _VADER is None:
+        with _ANALYZER_LOCK:
+            if _VADER is None:
+                _VADER = SentimentIntensityAnalyzer()
+    return _VADER
+
+
+def fit_topic_idf(texts, path: str = None, max_features: int = 50000) -> TfidfVectorizer:
+    """
+    Fits the topic_ngrams vectorizer on the sentences of a corpus, so IDF reflects
+    what is common across meetings rather than within one. Saves it to path if
+    given and makes it the process-wide default for topic_ngrams.
+    """
+    sents = (s for t in texts for s in _as_transcript(t).sentences())
+    vect = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), max_features=max_features)
+    vect.fit(sents)
+    blob = pickle.dumps(vect)
+    if path:
+        with open(path, "wb") as f:
+            f.write(blob)
+    _install_topic_idf(blob, vect)
+    return vect
+
+
+def load_topic_idf(path: str) -> TfidfVectorizer:
+    """Loads a vectorizer saved by fit_topic_idf and makes it the default for topic_ngrams."""
+    with open(path, "rb") as f:
+        blob = f.read()
+    return _install_topic_idf(blob)
+
+
+def _install_topic_idf(blob: bytes, vect: TfidfVectorizer = None) -> TfidfVectorizer:
+    # Also the initializer of analyse_meetings' spawn workers, which re-import this
+    # module without the parent's fitted IDF
+    global _TOPIC_IDF, _TOPIC_IDF_BLOB, _TOPIC_IDF_ID
+    _TOPIC_IDF = vect if vect is not None else pickle.loads(blob)
+    _TOPIC_IDF_BLOB, _TOPIC_IDF_ID = blob, hashlib.sha256(blob).hexdigest()
+    return _TOPIC_IDF
 
 
 # ---------------- Your original helpers ----------------
-def extract_key_points(text: str, n: int = 7) -> List[str]:
+@metrics.timed("rake")
+def extract_key_points(text: Union[str, Transcript], n: int = 7) -> List[str]:
     """RAKE-based key phrases -> bullet points."""
-    r = Rake()  # uses NLTK stopwords; will auto-download at first run
-    r.extract_keywords_from_text(text)
+    r = _get_rake()
+    r.extract_keywords_from_text(_as_transcript(text).text)
     phrases = r.get_ranked_phrases()[: max(3, n)]
+    return _to_bullets(phrases, n)
+
+
+def _to_bullets(phrases: List[str], n: int) -> List[str]:
     bullets = []
     for p in phrases:
         p = p.strip(" .,-;").capitalize()
@@ -174,54 +807,118 @@ def extract_key_points(text: str, n: int = 7) -> List[str]:
     return bullets[:n]
 
 
-def extract_action_items(text: str) -> List[str]:
+_IMPERATIVE_RE = re.compile(
+    r"^(please\s+)?(let's\s+|kindly\s+)?(review|create|share|send|prepare|finalize|follow|check|update|implement|fix|test|deploy|schedule|draft|confirm|assign)\b",
+    re.I,
+)
+_FUTURE_RE = re.compile(r"\b(will|shall|by\s+\w+ \d{1,2}|\bETA\b|\bbefore\s+\w+ \d{1,2})\b", re.I)
+
+
+def _is_action_item(sentence: str) -> bool:
+    return bool(_IMPERATIVE_RE.search(sentence) or _FUTURE_RE.search(sentence))
+
+
+@metrics.timed("action_items")
+def extract_action_items(text: Union[str, Transcript]) -> List[str]:
     """
     Lightweight heuristic extraction:
     - imperative verbs at sentence start
     - future commitments ('will', 'by <date>', 'before <date>')
     - owners ('@name' or 'Name will')
     """
-    candidates = []
-    sents = re.split(r"(?<=[.?!])\s+", text)
-    imperative = re.compile(
-        r"^(please\s+)?(let's\s+|kindly\s+)?(review|create|share|send|prepare|finalize|follow|check|update|implement|fix|test|deploy|schedule|draft|confirm|assign)\b",
-        re.I,
-    )
-    future = re.compile(r"\b(will|shall|by\s+\w+ \d{1,2}|\bETA\b|\bbefore\s+\w+ \d{1,2})\b", re.I)
-
-    for s in sents:
-        s_clean = s.strip()
-        if not s_clean:
-            continue
-        if imperative.search(s_clean) or future.search(s_clean):
-            candidates.append(s_clean)
+    candidates = [s for s in _as_transcript(text).sentences() if _is_action_item(s)]
     uniq = list(dict.fromkeys(candidates))
     return uniq[:8]
 
 
-def sentiment_and_tone(text: str) -> Dict[str, float]:
-    analyzer = SentimentIntensityAnalyzer()
-    scores = analyzer.polarity_scores(text)
+@metrics.timed("vader")
+def sentiment_and_tone(text: Union[str, Transcript]) -> Dict[str, float]:
+    analyzer = _get_vader()
+    scores = analyzer.polarity_scores(_as_transcript(text).text)
     return scores
 
 
-def topic_ngrams(text: str, top_k: int = 6) -> List[str]:
+def _sentence_tfidf(doc: Transcript, idf_model: TfidfVectorizer = None):
     """
-    Simple, fast TF-IDF over sentences to surface top n-grams as 'topics'.
+    The topic_ngrams sentence x n-gram TF-IDF matrix and its vectorizer: the
+    corpus-fitted one if available, else one fitted on this transcript.
     """
-    sents = [s.strip() for s in re.split(r"(?<=[.?!])\s+", text) if s.strip()]
-    if not sents:
-        return []
+    sents = doc.sentences()  # sliced lazily from the offsets while vectorizing
+    vect = idf_model if idf_model is not None else _TOPIC_IDF
+    if vect is not None:
+        return vect.transform(sents), vect
     vect = TfidfVectorizer(
         stop_words="english",
         ngram_range=(1, 2),
         max_features=2000,
     )
-    X = vect.fit_transform(sents)
+    return vect.fit_transform(sents), vect
+
+
+@metrics.timed("prefilter")
+def salience_prefilter(
+    text: Union[str, Transcript],
+    tokenizer=None,
+    ratio: float = None,
+    target_tokens: int = None,
+) -> Transcript:
+    """
+    Extractive pre-pass for BART: keeps the highest-scoring sentences, in original
+    order, until target_tokens (or ratio * the transcript's tokens) is used.
+    A sentence scores by how much of the meeting's topic mass it carries: its
+    TF-IDF row dotted with the same column sums topic_ngrams ranks topics by.
+    Greetings, filler and back-and-forth score low. Token counts come from the
+    tokenizer when given, else ~1.3 tokens per word.
+    """
+    doc = _as_transcript(text)
+    if len(doc) < 2 or (ratio is None and target_tokens is None):
+        return doc
+    if tokenizer is not None:
+        counts = doc.sentence_token_counts(tokenizer)
+    else:
+        counts = np.array([int(len(s.split()) * 1.3) + 1 for s in doc.sentences()])
+    budget = target_tokens if target_tokens is not None else int(counts.sum() * ratio)
+    if counts.sum() <= budget:
+        return doc
+
+    try:
+        X, _ = _sentence_tfidf(doc)
+    except ValueError:  # nothing but stopwords
+        return doc
+    topic_mass = X.sum(axis=0).A1
+    score = X.dot(topic_mass)
+
+    keep, used = [], 0
+    for i in np.argsort(-score, kind="stable"):
+        if used + counts[i] > budget:
+            continue
+        keep.append(int(i))
+        used += int(counts[i])
+    if not keep:  # every sentence is over budget; the chunker will truncate the best one
+        keep = [int(np.argmax(score))]
+    return Transcript(" ".join(doc.sentence(i) for i in sorted(keep)), cleaned=True)
+
+
+@metrics.timed("tfidf")
+def topic_ngrams(text: Union[str, Transcript], top_k: int = 6, idf_model: TfidfVectorizer = None) -> List[str]:
+    """
+    Simple, fast TF-IDF over sentences to surface top n-grams as 'topics'.
+    With a corpus-fitted idf_model (or one loaded via load_topic_idf) the
+    sentences are only transformed, using the shared vocabulary and IDF.
+    """
+    doc = _as_transcript(text)
+    if not len(doc):
+        return []
+    X, vect = _sentence_tfidf(doc, idf_model)
     scores = X.sum(axis=0).A1
     terms = vect.get_feature_names_out()
     top_idx = scores.argsort()[::-1][: top_k * 2]
-    raw = [terms[i] for i in top_idx]
+    # A corpus vocabulary can leave most terms at zero for this text
+    return _pick_topics([terms[i] for i in top_idx if scores[i] > 0], top_k)
+
+
+def _pick_topics(raw: List[str], top_k: int) -> List[str]:
+    """Drops bare numbers and case-duplicates from ranked terms, keeps top_k."""
     clean_terms = []
     seen = set()
     for t in raw:
@@ -236,26 +933,366 @@ def topic_ngrams(text: str, top_k: int = 6) -> List[str]:
     return clean_terms
 
 
+# ---------------- Extractive summarizer ----------------
+def _sentence_vectors(doc: Transcript):
+    """L2-normalised TF-IDF rows, one per sentence (scipy sparse CSR)."""
+    vect = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    return vect.fit_transform(doc.sentences())
+
+
+def _pagerank(sim, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100):
+    """Power-iteration PageRank on a sparse, symmetric similarity matrix."""
+    n = sim.shape[0]
+    out_weight = np.asarray(sim.sum(axis=1)).ravel()
+    out_weight[out_weight == 0] = 1.0
+    # Column-stochastic transition: M[i, j] = sim[j, i] / out_weight[j]
+    trans = (sp.diags(1.0 / out_weight) @ sim).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        nxt = (1 - damping) / n + damping * trans.dot(rank)
+        if np.abs(nxt - rank).sum() < tol:
+            return nxt
+        rank = nxt
+    return rank
+
+
+def _similarity_graph(X, min_sim: float = 0.05, top_k: int = 10, block: int = 256):
+    """
+    Sparse cosine-similarity graph keeping each sentence's top_k neighbours above
+    min_sim, symmetrised. Built `block` rows at a time: on long transcripts most
+    sentence pairs share a word, so the full X @ X.T would be close to dense.
+    """
+    n = X.shape[0]
+    k = min(top_k, n - 1)
+    if k <= 0:
+        return sp.csr_matrix((n, n))
+    rows, cols, vals = [], [], []
+    # A small vocabulary (many shared words) makes the product dense anyway, and
+    # sparse @ dense is then far cheaper; a large one keeps X.T and the product sparse
+    dense = X.shape[1] * n <= 1 << 22
+    XT = X.T.toarray() if dense else X.T.tocsr()
+    for start in range(0, n, block):
+        sims = X[start : start + block] @ XT
+        if dense:
+            idx = np.arange(sims.shape[0])
+            sims[idx, start + idx] = 0.0
+            top = np.argpartition(sims, n - k, axis=1)[:, n - k :]
+            v = np.take_along_axis(sims, top, axis=1)
+            r, c = np.broadcast_to(idx[:, None], top.shape), top
+        else:
+            # Few nonzeros per row: rank them within their row instead of densifying
+            b = sims.tocoo()
+            keep = b.row + start != b.col
+            r, c, v = b.row[keep], b.col[keep], b.data[keep]
+            order = np.lexsort((-v, r))
+            r, c, v = r[order], c[order], v[order]
+            first = np.arange(len(r)) - np.searchsorted(r, r) < k
+            r, c, v = r[first], c[first], v[first]
+        keep = v >= min_sim
+        rows.append(r[keep] + start)
+        cols.append(c[keep])
+        vals.append(v[keep])
+    sim = sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+    return sim.maximum(sim.T).tocsr()
+
+
+def _salience(doc: Transcript, min_sim: float = 0.05, top_k: int = 10):
+    """Sentence vectors and PageRank salience (max-normalised) over their similarity graph."""
+    X = _sentence_vectors(doc)
+    rank = _pagerank(_similarity_graph(X, min_sim, top_k))
+    return X, rank / (rank.max() or 1.0)
+
+
+@metrics.timed("extractive")
+def extractive_summary(
+    text: Union[str, Transcript],
+    max_sentences: int = 6,
+    mmr_lambda: float = 0.7,
+    min_sim: float = 0.05,
+) -> str:
+    """
+    Fast TextRank-style extractive summary:
+    1) sparse TF-IDF sentence vectors, cosine similarity computed a block of rows
+       at a time, keeping each sentence's top neighbours (so the graph stays
+       sparse on long transcripts)
+    2) PageRank by power iteration for salience
+    3) MMR selection (salience vs. similarity to already-picked sentences) to avoid
+       near-duplicates; picked sentences come back in original order.
+    """
+    doc = _as_transcript(text)
+    if len(doc) <= max_sentences:
+        return doc.text
+    try:
+        X, rank = _salience(doc, min_sim)
+    except ValueError:  # nothing but stopwords
+        return " ".join(doc.sentence(i) for i in range(max_sentences))
+
+    # MMR over the top candidates only; keeps selection O(k * candidates)
+    candidates = np.argsort(-rank)[: max(50, max_sentences * 10)]
+    picked: List[int] = []
+    redundancy = np.zeros(len(candidates))
+    cand_rows = X[candidates]
+    for _ in range(min(max_sentences, len(candidates))):
+        score = mmr_lambda * rank[candidates] - (1 - mmr_lambda) * redundancy
+        if picked:
+            score[np.isin(candidates, picked)] = -np.inf
+        best = int(np.argmax(score))
+        picked.append(int(candidates[best]))
+        redundancy = np.maximum(redundancy, (cand_rows @ X[candidates[best]].T).toarray().ravel())
+    return " ".join(doc.sentence(i) for i in sorted(picked))
+
+
+# ---------------- Latency budget ----------------
+# Per-model cost model: one generate call on a chunk of n input tokens costs about
+# base_s + per_token_s * n (output length is fixed by max_summary_words).
+# calibrate_cost_model() measures it on this machine; the defaults are deliberately
+# pessimistic CPU numbers for bart-large-cnn so an uncalibrated box under-promises.
+_COST_MODEL_PATH = os.path.join(_ARTIFACT_DIR, "cost_model.json")
+_COST_MODEL = None
+_DEFAULT_COSTS = {
+    "load_s": 8.0,
+    "beam": {"base_s": 2.5, "per_token_s": 0.004},
+    "greedy": {"base_s": 0.8, "per_token_s": 0.0015},
+}
+_SMALL_MODEL = "sshleifer/distilbart-cnn-12-6"
+_CALIBRATION_TEXT = (
+    "Team met to discuss Q4 launch timelines. Priya will finalize UI copy by Oct 22. "
+    "Please create the deployment checklist. Let's prepare the UAT plan this week. "
+    "Backend integration is blocked on API v2 and Rohit will update the schema by Friday. "
+    "We agreed to target a soft launch on Nov 10 pending security review. "
+) * 40
+
+
+def calibrate_cost_model(
+    models: List[str] = ("facebook/bart-large-cnn", _SMALL_MODEL),
+    backend: str = "torch",
+    path: str = None,
+    repeats: int = 2,
+) -> Dict[str, Dict]:
+    """
+    Times model load plus beam and greedy generation on short and full-window
+    chunks for each model, fits base + per-token cost, and saves the table as JSON
+    (default: cost_model.json next to the exported backends).
+    """
+    global _COST_MODEL
+    approx_tokens, min_tokens = _length_bounds(140)
+    table = _load_cost_model(path) or {}
+    for m in models:
+        t0 = time.perf_counter()
+        summarizer, tokenizer = _load_bart(m, backend)
+        entry = {"load_s": time.perf_counter() - t0}
+        ids = tokenizer(_CALIBRATION_TEXT, add_special_tokens=False)["input_ids"]
+        short_n, long_n = 128, min(900, len(ids))
+        for mode, beams in (("beam", None), ("greedy", 1)):
+            times = {}
+            for n in (short_n, long_n):
+                best = float("inf")
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    _summarize_ids([ids[:n]], summarizer, approx_tokens, min_tokens, 1, beams)
+                    best = min(best, time.perf_counter() - t0)
+                times[n] = best
+            per_token = max(0.0, (times[long_n] - times[short_n]) / (long_n - short_n))
+            entry[mode] = {"base_s": max(0.0, times[short_n] - per_token * short_n), "per_token_s": per_token}
+        table[f"{m}|{backend}"] = entry
+
+    path = path or _COST_MODEL_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2)
+    _COST_MODEL = table
+    return table
+
+
+def _load_cost_model(path: str = None) -> Dict[str, Dict]:
+    global _COST_MODEL
+    if _COST_MODEL is None or path:
+        try:
+            with open(path or _COST_MODEL_PATH, "r", encoding="utf-8") as f:
+                _COST_MODEL = json.load(f)
+        except (OSError, ValueError):
+            _COST_MODEL = {}
+    return _COST_MODEL
+
+
+def _predict_s(
+    model_name: str,
+    backend: str,
+    mode: str,
+    n_tokens: int,
+    max_input_tokens: int,
+    overlap: int,
+    second_pass: bool,
+) -> float:
+    costs = _load_cost_model().get(f"{model_name}|{backend}", _DEFAULT_COSTS)
+    c = costs[mode]
+    step = max(1, max_input_tokens - overlap)
+    n_chunks = max(1, math.ceil(max(0, n_tokens - overlap) / step))
+    secs = n_chunks * c["base_s"] + (n_tokens + (n_chunks - 1) * overlap) * c["per_token_s"]
+    if second_pass and n_chunks > 1:
+        approx_tokens, _ = _length_bounds(140)
+        reduce_in = min(max_input_tokens, n_chunks * approx_tokens)
+        secs += c["base_s"] + reduce_in * c["per_token_s"]
+    if (model_name, backend) not in _SUMMARIZERS:
+        secs += costs.get("load_s", 0.0)
+    return secs
+
+
+def budgeted_summary(
+    text: Union[str, Transcript],
+    deadline_ms: float,
+    bart_model: str = "facebook/bart-large-cnn",
+    small_model: str = _SMALL_MODEL,
+    backend: str = "torch",
+    max_input_tokens: int = 950,
+    chunk_overlap_tokens: int = 50,
+    max_sentences: int = 6,
+    safety: float = 0.8,
+    use_cache: bool = True,
+) -> Dict[str, object]:
+    """
+    Picks the best summarization strategy predicted (by the calibrated cost model)
+    to finish within safety * deadline_ms, trying in order:
+      full           bart_model, default beams, reduce + second pass
+      no-second-pass bart_model, default beams, map step only
+      greedy         bart_model, greedy decoding, map step only
+      prefilter      bart_model, greedy, on the most salient sentences only
+      small-model    small_model, greedy, on the most salient sentences only
+      extractive     extractive_summary (no model)
+    Returns the summary with the strategy used and the share of the budget it took.
+    use_cache is passed to bart_summary (per-chunk summary cache).
+    """
+    t0 = time.perf_counter()
+    doc = _as_transcript(text)
+    budget_s = deadline_ms / 1000.0 * safety
+    summary, strategy = None, "extractive"
+
+    if doc.word_count < 40:
+        summary, strategy = doc.text, "passthrough"
+    elif _TRANS_AVAILABLE:
+        try:
+            tokenizer = _load_tokenizer(bart_model)
+            n_tokens = len(doc.encoding(tokenizer)["input_ids"])
+            plans = [
+                ("full", bart_model, "beam", None, True),
+                ("no-second-pass", bart_model, "beam", None, False),
+                ("greedy", bart_model, "greedy", 1, False),
+            ]
+            for name, model, mode, beams, second in plans:
+                left = budget_s - (time.perf_counter() - t0)
+                if _predict_s(model, backend, mode, n_tokens, max_input_tokens, chunk_overlap_tokens, second) <= left:
+                    summary = bart_summary(
+                        doc,
+                        model_name=model,
+                        max_input_tokens=max_input_tokens,
+                        chunk_overlap_tokens=chunk_overlap_tokens,
+                        second_pass=second,
+                        num_beams=beams,
+                        backend=backend,
+                        use_cache=use_cache,
+                    )
+                    strategy = name
+                    break
+            else:
+                # Shrink the input to what one greedy window can afford within the budget
+                for name, model in (("prefilter", bart_model), ("small-model", small_model)):
+                    left = budget_s - (time.perf_counter() - t0)
+                    costs = _load_cost_model().get(f"{model}|{backend}", _DEFAULT_COSTS)
+                    if (model, backend) not in _SUMMARIZERS:
+                        left -= costs.get("load_s", 0.0)
+                    g = costs["greedy"]
+                    afford = int(min(max_input_tokens, (left - g["base_s"]) / max(g["per_token_s"], 1e-9)))
+                    if afford >= 128:
+                        tok = _load_tokenizer(model)
+                        small = salience_prefilter(doc, tok, target_tokens=afford)
+                        summary = bart_summary(
+                            small,
+                            model_name=model,
+                            max_input_tokens=max_input_tokens,
+                            chunk_overlap_tokens=chunk_overlap_tokens,
+                            second_pass=False,
+                            num_beams=1,
+                            backend=backend,
+                            use_cache=use_cache,
+                        )
+                        strategy = name
+                        break
+        except Exception:
+            summary = None  # fall through to extractive, like short_summary does
+
+    if summary is None:
+        summary, strategy = extractive_summary(doc, max_sentences=max_sentences), "extractive"
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "summary": summary,
+        "strategy": strategy,
+        "budget_ms": deadline_ms,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "budget_used": round(elapsed_ms / deadline_ms, 3) if deadline_ms else None,
+    }
+
+
 # ---------------- Public API ----------------
+SUMMARY_MODES = ("abstractive", "extractive-fast", "textrank")
+
+
 def short_summary(
-    text: str,
+    text: Union[str, Transcript],
     ratio: float = 0.15,
     max_sentences: int = 6,
     use_bart: bool = True,
     bart_model: str = "facebook/bart-large-cnn",
+    mode: str = "abstractive",
+    deadline_ms: float = None,
+    use_cache: bool = True,
+    max_input_tokens: int = 950,
 ) -> str:
     """
     Defaults to BART abstractive summarization.
     If transformers/BART isn't available, falls back to your original extractive summary
-    (summa TextRank) or first-N sentences.
+    (summa TextRank), then the built-in extractive_summary, then first-N sentences.
+    mode="extractive-fast" goes straight to extractive_summary (milliseconds even on
+    50k+ word transcripts); mode="textrank" skips BART.
+    deadline_ms picks the strategy from the latency budget (see budgeted_summary).
+    Only the summary text is returned; call budgeted_summary, or analyse_meeting
+    with deadline_ms, to also get the strategy used and budget_used.
+    use_cache=False skips the per-chunk BART summary cache; max_input_tokens is
+    BART's chunk window (see bart_summary).
     """
-    text = clean_text(text)
-    if not text or len(text.split()) < 40:
-        return text
+    return _short_summary(text, ratio, max_sentences, use_bart, bart_model, mode, deadline_ms, use_cache, max_input_tokens)[0]
+
+
+def _short_summary(
+    text: Union[str, Transcript],
+    ratio: float = 0.15,
+    max_sentences: int = 6,
+    use_bart: bool = True,
+    bart_model: str = "facebook/bart-large-cnn",
+    mode: str = "abstractive",
+    deadline_ms: float = None,
+    use_cache: bool = True,
+    max_input_tokens: int = 950,
+):
+    # short_summary plus the tier that produced it: "bart", "budgeted", "textrank",
+    # "extractive", "lead" (first sentences) or "verbatim" (too short to summarize)
+    if mode not in SUMMARY_MODES:
+        raise ValueError(f"Unknown summary mode {mode!r}. Choose from {SUMMARY_MODES}.")
+    doc = _as_transcript(text)
+    text = doc.text
+    if doc.word_count < 40:
+        return text, "verbatim"
+
+    if mode == "extractive-fast":
+        return extractive_summary(doc, max_sentences=max_sentences), "extractive"
+    if deadline_ms is not None and use_bart and mode == "abstractive":
+        return budgeted_summary(
+            doc, deadline_ms, bart_model=bart_model, max_input_tokens=max_input_tokens, max_sentences=max_sentences, use_cache=use_cache
+        )["summary"], "budgeted"
+    use_bart = use_bart and mode == "abstractive"
 
     if use_bart and _TRANS_AVAILABLE:
         try:
-            return bart_summary(text, model_name=bart_model)
+            return bart_summary(doc, model_name=bart_model, max_input_tokens=max_input_tokens, use_cache=use_cache), "bart"
         except Exception:
             # If BART fails (OOM or missing weights), drop to extractive
             pass
@@ -264,41 +1301,502 @@ def short_summary(
     if textrank_summarize is not None:
         try:
             s = textrank_summarize(text, ratio=ratio, split=False)
-            sents = re.split(r"(?<=[.?!])\s+", s)
-            return " ".join(sents[:max_sentences])
+            sents = split_sentences(s)
+            return " ".join(sents[:max_sentences]), "textrank"
         except Exception:
             pass
 
+    try:
+        return extractive_summary(doc, max_sentences=max_sentences), "extractive"
+    except Exception:
+        pass
+
     # Final fallback: first N sentences
-    sents = re.split(r"(?<=[.?!])\s+", text)
-    return " ".join(sents[:max_sentences])
+    return " ".join(doc.sentence(i) for i in range(min(max_sentences, len(doc)))), "lead"
+
+
+ANALYSIS_FIELDS = ("summary", "key_points", "action_items", "sentiment", "topics", "word_count")
+_STAGE_POOL = None
+
+
+def _get_stage_pool():
+    # Threads are enough: generate() releases the GIL, so the heuristic stages
+    # run while BART is busy, and nothing needs pickling or a second model copy.
+    global _STAGE_POOL
+    if _STAGE_POOL is None:
+        _STAGE_POOL = ThreadPoolExecutor(max_workers=len(ANALYSIS_FIELDS), thread_name_prefix="analyse")
+    return _STAGE_POOL
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
 
 
+@metrics.timed("analyse_meeting", top=True)
 def analyse_meeting(
-    text: str,
+    text: Union[str, Transcript],
     key_points: int = 7,
     use_bart: bool = True,
     bart_model: str = "facebook/bart-large-cnn",
+    use_cache: bool = True,
+    fields: List[str] = None,
+    parallel: bool = False,
+    deadline_ms: float = None,
 ) -> Dict[str, object]:
-    text = clean_text(text)
-    return {
-        "summary": short_summary(text, use_bart=use_bart, bart_model=bart_model),
-        "key_points": extract_key_points(text, n=key_points),
-        "action_items": extract_action_items(text),
-        "sentiment": sentiment_and_tone(text),
-        "topics": topic_ngrams(text),
-        "word_count": len(text.split()),
+    """
+    fields: subset of ANALYSIS_FIELDS to compute (default: all). Leaving out
+    "summary" never loads a model.
+    parallel: run the requested stages concurrently on a shared thread pool.
+    deadline_ms: latency budget for the summary; the chosen strategy and the
+    share of the budget it used are returned under "summary_strategy". That
+    choice depends on the machine's state (model loaded, calibration), so
+    budgeted reports skip the report cache; the per-chunk BART cache still applies.
+    use_cache=False bypasses both the report cache and the per-chunk BART cache.
+    The report carries per-stage wall seconds under "timings".
+    Cleaning and sentence segmentation happen once, in the shared Transcript.
+    """
+    doc = _as_transcript(text)
+    wanted = list(ANALYSIS_FIELDS) if fields is None else list(dict.fromkeys(fields))
+    unknown = [f for f in wanted if f not in ANALYSIS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown analysis fields: {unknown}. Choose from {ANALYSIS_FIELDS}.")
+
+    budgeted = deadline_ms is not None and use_bart and "summary" in wanted
+    cached = use_cache and _CACHE is not None and not budgeted
+    params = {"key_points": key_points}
+    topic_idf = _TOPIC_IDF_ID if "topics" in wanted else None
+    # Without transformers BART can never run: the report is the use_bart=False one
+    # for good, so key it (and cache it) as that
+    bart_possible = use_bart and _TRANS_AVAILABLE
+    key = make_key("analyse", doc.text, bart_model if bart_possible else None, params, sorted(wanted), topic_idf)
+    if cached:
+        hit, secs = _timed(lambda: _CACHE.get(key))
+        if hit is not None:
+            hit["timings"] = {"cache": secs}
+            return hit
+
+    tier = []
+
+    def summary_stage():
+        if budgeted:
+            return budgeted_summary(doc, deadline_ms, bart_model=bart_model, use_cache=use_cache)
+        s, t = _short_summary(doc, use_bart=use_bart, bart_model=bart_model, use_cache=use_cache)
+        tier.append(t)
+        return s
+
+    stages = {
+        "summary": summary_stage,
+        "key_points": lambda: extract_key_points(doc, n=key_points),
+        "action_items": lambda: extract_action_items(doc),
+        "sentiment": lambda: sentiment_and_tone(doc),
+        "topics": lambda: topic_ngrams(doc),
+        "word_count": lambda: doc.word_count,
     }
+    if parallel and len(wanted) > 1:
+        pool = _get_stage_pool()
+        # Submit in ANALYSIS_FIELDS order so the heavy summary stage starts first
+        bound = metrics.bind(metrics.current_run(), _timed)  # pool threads report into this call's run
+        futures = {f: pool.submit(bound, stages[f]) for f in ANALYSIS_FIELDS if f in wanted}
+        done = {f: fut.result() for f, fut in futures.items()}
+    else:
+        done = {f: _timed(stages[f]) for f in wanted}
+
+    report: Dict[str, object] = {f: done[f][0] for f in wanted}
+    if budgeted:
+        info = report["summary"]
+        report["summary"] = info.pop("summary")
+        report["summary_strategy"] = info
+    # A fallback after a failed BART run (OOM, weights not downloaded yet) is not
+    # what this key asks for; leave it out so the next call retries BART
+    degraded = bart_possible and tier and tier[0] not in ("bart", "verbatim")
+    if cached and not degraded:
+        _CACHE.set(key, report)
+    report["timings"] = {f: done[f][1] for f in wanted}
+    return report
+
+
+# ---------------- Live meetings ----------------
+class MeetingSummarizer:
+    """
+    Incremental analyse_meeting for a transcript that keeps growing (meeting rooms).
+
+    feed() takes new transcript text; every completed sentence updates rolling
+    key-phrase (RAKE degree/frequency), topic (TF-IDF mass/document frequency),
+    sentiment and action-item state, and each completed max_input_tokens window
+    is summarized exactly once. Window summaries are folded fan_in at a time into
+    coarser levels, so snapshot() only summarizes the open window plus a handful
+    of pieces: its cost stays roughly flat as the meeting grows.
+
+    Sentiment is the word-weighted mean of per-sentence VADER scores, and topics use
+    per-sentence normalised term mass, so both approximate (not reproduce) the
+    whole-text analyse_meeting numbers.
+    """
+
+    def __init__(
+        self,
+        key_points: int = 7,
+        use_bart: bool = True,
+        bart_model: str = "facebook/bart-large-cnn",
+        max_input_tokens: int = 950,
+        fan_in: int = 4,
+    ):
+        self.key_points = key_points
+        self.use_bart = use_bart and _TRANS_AVAILABLE
+        self.bart_model = bart_model
+        self.max_input_tokens = max_input_tokens
+        self.fan_in = max(2, fan_in)
+
+        self._pending = ""  # trailing text without a sentence end yet
+        self._window: List[str] = []  # completed sentences not yet summarized
+        self._window_tokens = 0
+        self._levels: List[List[str]] = []  # _levels[k]: summaries covering fan_in**k windows
+        self._word_count = 0
+        self._actions: Dict[str, None] = {}
+
+        rake = _get_rake()
+        self._stopwords = set(rake.stopwords)
+        self._punct = set(rake.punctuations)
+        self._rake_freq: Counter = Counter()
+        self._rake_degree: Counter = Counter()
+        self._phrases: Dict[tuple, None] = {}
+
+        self._analyzer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2)).build_analyzer()
+        self._term_mass: Counter = Counter()
+        self._term_df: Counter = Counter()
+        self._n_sents = 0
+
+        self._vader = _get_vader()
+        self._sent_sum: Counter = Counter()
+        self._sent_weight = 0
+
+    # --- ingest ---
+    def feed(self, text_segment: str) -> None:
+        """Appends transcript text; only sentences completed by this segment are processed."""
+        text = clean_text(self._pending + " " + text_segment)
+        sents = split_sentences(text)
+        self._pending = "" if re.search(r"[.?!]$", text) else sents.pop()
+        for s in sents:
+            if s:
+                self._add_sentence(s)
+
+    def flush(self) -> None:
+        """Treats any trailing partial sentence as complete (e.g. when the meeting ends)."""
+        if self._pending:
+            pending, self._pending = self._pending, ""
+            self._add_sentence(pending)
+
+    def _add_sentence(self, s: str) -> None:
+        n_words = len(s.split())
+        self._word_count += n_words
+        if _is_action_item(s):
+            self._actions.setdefault(s, None)
+        self._update_rake(s)
+        self._update_topics(s)
+        for k, v in self._vader.polarity_scores(s).items():
+            self._sent_sum[k] += v * n_words
+        self._sent_weight += n_words
+
+        n_tokens = self._count_tokens(s)
+        if self._window and self._window_tokens + n_tokens > self.max_input_tokens:
+            self._close_window()
+        self._window.append(s)
+        self._window_tokens += n_tokens
+
+    def _count_tokens(self, s: str) -> int:
+        if self.use_bart:
+            return len(_load_tokenizer(self.bart_model)(s, add_special_tokens=False)["input_ids"])
+        return int(len(s.split()) * 1.3) + 1
+
+    def _summarize(self, text: str) -> str:
+        # Same window as the one cut here, so a full window is one chunk, not two plus a reduce
+        return short_summary(text, use_bart=self.use_bart, bart_model=self.bart_model, max_input_tokens=self.max_input_tokens)
+
+    def _close_window(self) -> None:
+        summary = self._summarize(" ".join(self._window))
+        self._window, self._window_tokens = [], 0
+        # Carry like a counter: fan_in summaries at one level fold into one above
+        level = 0
+        while True:
+            if level == len(self._levels):
+                self._levels.append([])
+            self._levels[level].append(summary)
+            if len(self._levels[level]) < self.fan_in:
+                break
+            summary = self._summarize(" ".join(self._levels[level]))
+            self._levels[level] = []
+            level += 1
+
+    def _update_rake(self, s: str) -> None:
+        # Same phrase split and degree/frequency scoring as rake_nltk, kept as running counts
+        phrase: List[str] = []
+        for w in wordpunct_tokenize(s.lower()) + [None]:
+            if w is None or w in self._stopwords or w in self._punct:
+                if phrase:
+                    for word in phrase:
+                        self._rake_freq[word] += 1
+                        self._rake_degree[word] += len(phrase)
+                    self._phrases.setdefault(tuple(phrase), None)
+                    phrase = []
+            else:
+                phrase.append(w)
+
+    def _update_topics(self, s: str) -> None:
+        tf = Counter(self._analyzer(s))
+        if not tf:
+            return
+        norm = math.sqrt(sum(v * v for v in tf.values()))
+        for t, v in tf.items():
+            self._term_mass[t] += v / norm
+            self._term_df[t] += 1
+        self._n_sents += 1
 
+    # --- read out ---
+    def snapshot(self) -> Dict[str, object]:
+        """Current report in the same shape as analyse_meeting()."""
+        # Oldest (coarsest) summaries first, then the open window
+        pieces = [p for level in reversed(self._levels) for p in level]
+        if self._window:
+            pieces.append(self._summarize(" ".join(self._window)))
+        summary = self._summarize(" ".join(pieces)) if len(pieces) > 1 else (pieces[0] if pieces else "")
 
-# ---------------- CLI quick test ----------------
+        ranked = heapq.nlargest(
+            max(3, self.key_points),
+            self._phrases,
+            key=lambda p: sum(self._rake_degree[w] / self._rake_freq[w] for w in p),
+        )
+        n = self._n_sents
+        top_terms = heapq.nlargest(
+            12,
+            self._term_mass,
+            key=lambda t: self._term_mass[t] * (math.log((1 + n) / (1 + self._term_df[t])) + 1),
+        )
+        weight = self._sent_weight or 1
+        return {
+            "summary": summary,
+            "key_points": _to_bullets([" ".join(p) for p in ranked], self.key_points),
+            "action_items": list(self._actions)[:8],
+            "sentiment": {k: self._sent_sum[k] / weight for k in ("neg", "neu", "pos", "compound")},
+            "topics": _pick_topics(top_terms, 6),
+            "word_count": self._word_count,
+        }
+
+
+# ---------------- Bulk processing ----------------
+def _heuristic_report(job) -> Dict[str, object]:
+    # Process-pool entry point: every non-summary stage for one transcript
+    text, key_points, fields = job
+    return _safe_heuristic_report(Transcript(text, cleaned=True), key_points, fields)
+
+
+def _safe_heuristic_report(doc: Transcript, key_points: int, fields: List[str]) -> Dict[str, object]:
+    # One unanalysable record (e.g. no usable tokens for topic_ngrams) must not
+    # abort a corpus job: failing stages come back as None plus an "error" field
+    try:
+        return analyse_meeting(doc, key_points=key_points, use_bart=False, use_cache=False, fields=fields)
+    except Exception:
+        pass
+    report: Dict[str, object] = {}
+    errors = []
+    for f in fields:
+        try:
+            report[f] = analyse_meeting(doc, key_points=key_points, use_bart=False, use_cache=False, fields=[f])[f]
+        except Exception as e:
+            report[f] = None
+            errors.append(f"{f}: {type(e).__name__}: {e}")
+    if errors:
+        report["error"] = "; ".join(errors)
+    return report
+
+
+def analyse_meetings(
+    docs: Iterable,
+    key_points: int = 7,
+    use_bart: bool = True,
+    bart_model: str = "facebook/bart-large-cnn",
+    fields: List[str] = None,
+    batch_docs: int = 32,
+    workers: int = None,
+    backend: str = "torch",
+) -> Iterator[Dict[str, object]]:
+    """
+    Streams analyse_meeting reports for many transcripts, in input order.
+    docs yields strings or dicts with a "transcript" key (the llm.py JSONL format;
+    an "id" key is copied to the report). Work proceeds batch_docs at a time, so
+    memory stays bounded however long docs is: the batch's heuristic stages fan
+    out over a process pool of `workers` processes while its summaries run through
+    one batched bart_summaries call here. A record whose heuristic stage fails gets
+    None for that field and an "error" field instead of stopping the run.
+
+    workers defaults to a quarter of the cores, and BART here gets the remaining
+    cores as torch threads. Each spawned worker re-imports this module, and with
+    it torch and transformers (a few hundred MB of RSS each, though the heuristics
+    never use them), so a bigger pool buys heuristic throughput with memory and
+    with cores taken from generation. Raise it when fields leaves out "summary".
+    workers=0 runs the heuristic stages in this process, after the summaries.
+    """
+    wanted = list(ANALYSIS_FIELDS) if fields is None else list(dict.fromkeys(fields))
+    unknown = [f for f in wanted if f not in ANALYSIS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown analysis fields: {unknown}. Choose from {ANALYSIS_FIELDS}.")
+    rest = [f for f in wanted if f != "summary"]
+    cores = os.cpu_count() or 1
+    workers = max(1, cores // 4) if workers is None else workers
+    pool = None
+    if rest and workers > 0:
+        # Spawned workers start without the fitted topic IDF; hand it over so
+        # "topics" matches what analyse_meeting gives for the same transcript
+        init = {"initializer": _install_topic_idf, "initargs": (_TOPIC_IDF_BLOB,)} if _TOPIC_IDF_BLOB is not None else {}
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), **init)
+    torch_threads = None
+    if pool is not None and "summary" in wanted and use_bart and _TRANS_AVAILABLE:
+        # Leave the pool its cores instead of oversubscribing them with BART's threads
+        torch_threads = torch.get_num_threads()
+        torch.set_num_threads(max(1, cores - workers))
+    it = iter(docs)
+    try:
+        while True:
+            batch = list(itertools.islice(it, batch_docs))
+            if not batch:
+                break
+            ids = [d.get("id") if isinstance(d, dict) else None for d in batch]
+            transcripts = [Transcript(str((d.get("transcript") or "") if isinstance(d, dict) else d)) for d in batch]
+
+            # Heuristics start in the pool first, then BART runs here meanwhile
+            pending = None
+            if pool is not None:
+                pending = pool.map(_heuristic_report, [(d.text, key_points, rest) for d in transcripts], chunksize=max(1, len(transcripts) // workers))
+            summaries = None
+            if "summary" in wanted:
+                summaries = _bulk_summaries(transcripts, use_bart, bart_model, backend)
+            if pending is not None:
+                reports = list(pending)
+            elif rest:
+                reports = [_safe_heuristic_report(d, key_points, rest) for d in transcripts]
+            else:
+                reports = [{"timings": {}} for _ in transcripts]
+
+            for i, report in enumerate(reports):
+                report.pop("timings", None)
+                if summaries is not None:
+                    report["summary"] = summaries[i]
+                out = {"id": ids[i]} if ids[i] is not None else {}
+                out.update((f, report[f]) for f in wanted)
+                if "error" in report:
+                    out["error"] = report["error"]
+                yield out
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if torch_threads is not None:
+            torch.set_num_threads(torch_threads)
+
+
+def _bulk_summaries(texts: List[Transcript], use_bart: bool, bart_model: str, backend: str = "torch") -> List[str]:
+    if use_bart and _TRANS_AVAILABLE:
+        try:
+            return bart_summaries(texts, model_name=bart_model, backend=backend)
+        except Exception:
+            pass  # same extractive fallback as short_summary
+    return [short_summary(t, use_bart=False) for t in texts]
+
+
+def iter_jsonl(path: str, skip: int = 0) -> Iterator[Dict]:
+    """Yields one JSON object per non-empty line, skipping the first `skip` records."""
+    with open(path, "r", encoding="utf-8") as f:
+        n = 0
+        for line in f:
+            if not line.strip():
+                continue
+            n += 1
+            if n > skip:
+                yield json.loads(line)
+
+
+def _resume_offset(path: str) -> int:
+    """
+    Number of complete records already in an output JSONL. A torn last line (from a
+    killed run) is cut off so appending continues from a clean record boundary.
+    """
+    if not os.path.exists(path):
+        return 0
+    done, good_end = 0, 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            done += 1
+            good_end = f.tell()
+    with open(path, "r+b") as f:
+        f.truncate(good_end)
+    return done
+
+
+def analyse_jsonl(input_path: str, output_path: str, resume: bool = True, flush_every: int = 32, **kwargs) -> int:
+    """
+    Runs analyse_meetings over a JSONL file and appends one report per line to
+    output_path. The output doubles as the checkpoint: with resume, records that
+    already have a report are skipped. Returns the number of records written now.
+    """
+    skip = _resume_offset(output_path) if resume else 0
+    written = 0
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        for report in analyse_meetings(iter_jsonl(input_path, skip=skip), **kwargs):
+            out.write(json.dumps(report, ensure_ascii=False) + "\n")
+            written += 1
+            if written % flush_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+    return written
+
+
+# ---------------- CLI ----------------
 if __name__ == "__main__":
-    demo_text = """
-    Team met to discuss Q4 launch timelines. Priya will finalize UI copy by Oct 22.
-    Please create the deployment checklist. Let's prepare the UAT plan this week.
-    Backend integration is blocked on API v2—Rohit will update the schema by Friday.
-    We agreed to target a soft launch on Nov 10 pending security review.
-    """
-    report = analyse_meeting(demo_text, use_bart=True, bart_model="sshleifer/distilbart-cnn-12-6")
-    from pprint import pprint
-    pprint(report)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Meeting analysis. Without --input, runs a quick demo.")
+    parser.add_argument("--input", default="", help="JSONL of {'transcript': ...} records")
+    parser.add_argument("--output", default="analysis.jsonl")
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-12-6")
+    parser.add_argument("--no_bart", action="store_true")
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--export_backend", action="store_true", help="build the --backend artifacts for --model and exit")
+    parser.add_argument("--calibrate", action="store_true", help="measure the latency cost model for --model and exit")
+    parser.add_argument("--fields", nargs="+", default=None, choices=ANALYSIS_FIELDS)
+    parser.add_argument("--batch_docs", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="heuristic-stage processes (default: a quarter of the cores; 0 = in-process)")
+    parser.add_argument("--no_resume", action="store_true", help="overwrite --output instead of continuing it")
+    args = parser.parse_args()
+
+    if args.export_backend:
+        print("Artifacts:", export_backend(args.model, args.backend))
+    elif args.calibrate:
+        table = calibrate_cost_model([args.model], backend=args.backend)
+        print(json.dumps(table, indent=2))
+    elif args.input:
+        n = analyse_jsonl(
+            args.input,
+            args.output,
+            resume=not args.no_resume,
+            flush_every=args.batch_docs,
+            use_bart=not args.no_bart,
+            bart_model=args.model,
+            fields=args.fields,
+            batch_docs=args.batch_docs,
+            workers=args.workers,
+            backend=args.backend,
+        )
+        print(f"Wrote {n} reports to {args.output}")
+    else:
+        demo_text = """
+        Team met to discuss Q4 launch timelines. Priya will finalize UI copy by Oct 22.
+        Please create the deployment checklist. Let's prepare the UAT plan this week.
+        Backend integration is blocked on API v2—Rohit will update the schema by Friday.
+        We agreed to target a soft launch on Nov 10 pending security review.
+        """
+        report = analyse_meeting(demo_text, use_bart=not args.no_bart, bart_model=args.model)
+        from pprint import pprint
+        pprint(report)
@@ -0,0 +1,353 @@
+# summariser_metrics.py
+# Opt-in instrumentation for meeting_summariser: per-stage wall time, token and
+# chunk counts, and peak RSS, emitted once per top-level call to pluggable sinks.
+#
+# Off by default: stage()/run() then hand back one shared no-op context manager,
+# so instrumented code pays a function call and a flag check.
+#
+# Work done in another process (the BART worker pool) is recorded there under
+# collect() and sent back with its results, then added to the caller's run with
+# merge(). Stage seconds are therefore summed over workers and can exceed the
+# run's wall time.
+#
+# Enable in code:
+#   import summariser_metrics as metrics
+#   metrics.enable(metrics.LogSink(), metrics.PrometheusSink("/var/lib/node_exporter/meetsum.prom"))
+# or from the environment (read at import):
+#   MEETSUM_METRICS="log,json:/tmp/meetsum.jsonl,prom:/tmp/meetsum.prom"
+
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+_ENABLED = False
+_SINKS: List[object] = []
+_LOCAL = threading.local()
+
+
+class _NoOp:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoOp()
+
+
+def _peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # KiB everywhere but macOS
+
+
+class Run:
+    """
+    One top-level call (e.g. analyse_meeting). Collects stage times and counters
+    from every thread working on it and is emitted to the sinks when it ends.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])  # name -> [calls, seconds]
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._t0 = 0.0
+
+    def add_stage(self, name: str, secs: float) -> None:
+        with self._lock:
+            st = self.stages[name]
+            st[0] += 1
+            st[1] += secs
+
+    def add_counts(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                self.counts[k] += v
+
+    def export(self) -> Dict:
+        """Picklable stages and counts, for merge() in another process."""
+        with self._lock:
+            return {"stages": {k: list(v) for k, v in self.stages.items()}, "counts": dict(self.counts)}
+
+    def merge(self, record: Dict) -> None:
+        with self._lock:
+            for k, (calls, secs) in record["stages"].items():
+                st = self.stages[k]
+                st[0] += calls
+                st[1] += secs
+            for k, v in record["counts"].items():
+                self.counts[k] += v
+
+    def __enter__(self):
+        self._prev = getattr(_LOCAL, "run", None)
+        _LOCAL.run = self
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _LOCAL.run = self._prev
+        record = {
+            "run": self.name,
+            "ts": time.time(),
+            "wall_s": round(time.perf_counter() - self._t0, 6),
+            "stages": {k: {"calls": v[0], "wall_s": round(v[1], 6)} for k, v in self.stages.items()},
+            "counts": dict(self.counts),
+            "peak_rss_bytes": _peak_rss_bytes(),
+            "error": exc[0].__name__ if exc[0] is not None else None,
+        }
+        for sink in _SINKS:
+            try:
+                sink.emit(record)
+            except Exception:
+                logging.getLogger(__name__).exception("metrics sink failed")
+        return False
+
+
+class _Stage:
+    __slots__ = ("name", "run", "t0")
+
+    def __init__(self, name: str, run: Run):
+        self.name = name
+        self.run = run
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run.add_stage(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _StandaloneStage(Run):
+    # A stage used outside any run is reported as a one-stage run of its own
+    def __exit__(self, *exc):
+        self.add_stage(self.name, time.perf_counter() - self._t0)
+        return super().__exit__(*exc)
+
+
+class _Collector(Run):
+    # Records even while instrumentation is off here and is never emitted
+    def __enter__(self):
+        global _ENABLED
+        self._was_enabled = _ENABLED
+        _ENABLED = True
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        global _ENABLED
+        _LOCAL.run = self._prev
+        _ENABLED = self._was_enabled
+        return False
+
+
+def run(name: str):
+    """Context manager around a top-level call; nested inside another run it is just a stage."""
+    if not _ENABLED:
+        return _NOOP
+    current = getattr(_LOCAL, "run", None)
+    return _Stage(name, current) if current is not None else Run(name)
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current run."""
+    if not _ENABLED:
+        return _NOOP
+    current = getattr(_LOCAL, "run", None)
+    return _Stage(name, current) if current is not None else _StandaloneStage(name)
+
+
+def count(**counts: int) -> None:
+    """Adds to the current run's counters, e.g. count(tokens_in=812, chunks=3)."""
+    if not _ENABLED:
+        return
+    current = getattr(_LOCAL, "run", None)
+    if current is not None:
+        current.add_counts(counts)
+
+
+def collect(name: str) -> Run:
+    """
+    Context manager recording into a private run that is handed back rather than
+    emitted; send its export() to the parent process for merge().
+    """
+    return _Collector(name)
+
+
+def merge(record: Dict) -> None:
+    """Adds stages and counts exported from a collect() run to the current run."""
+    current = current_run()
+    if current is not None and record:
+        current.merge(record)
+
+
+def timed(name: str, top: bool = False):
+    """Decorator form of stage(), or of run() with top=True."""
+    ctx = run if top else stage
+
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            with ctx(name):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def current_run():
+    return getattr(_LOCAL, "run", None) if _ENABLED else None
+
+
+def bind(run_obj, fn):
+    """Wraps fn so that, in another thread, its stages land in run_obj."""
+    if run_obj is None:
+        return fn
+
+    def inner(*args, **kwargs):
+        prev = getattr(_LOCAL, "run", None)
+        _LOCAL.run = run_obj
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _LOCAL.run = prev
+
+    return inner
+
+
+# ---------------- Sinks ----------------
+class LogSink:
+    """One compact log line per run."""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("meeting_summariser.metrics")
+        self.level = level
+
+    def emit(self, record: Dict) -> None:
+        stages = " ".join(f"{k}={v['wall_s']:.3f}s" for k, v in record["stages"].items())
+        counts = " ".join(f"{k}={v}" for k, v in record["counts"].items())
+        self.logger.log(
+            self.level,
+            "%s wall=%.3fs %s %s peak_rss=%.0fMB",
+            record["run"], record["wall_s"], stages, counts, record["peak_rss_bytes"] / 2**20,
+        )
+
+
+class JsonSink:
+    """Appends each run record as one JSON line (to a path, or a stream like sys.stderr)."""
+
+    def __init__(self, path_or_stream=None):
+        self._lock = threading.Lock()
+        self.path = path_or_stream if isinstance(path_or_stream, str) else None
+        self.stream = None if self.path else (path_or_stream or sys.stderr)
+
+    def emit(self, record: Dict) -> None:
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            else:
+                self.stream.write(line)
+                self.stream.flush()
+
+
+class PrometheusSink:
+    """
+    Keeps running totals and rewrites a Prometheus text-exposition file (for the
+    node_exporter textfile collector) after every run; written atomically.
+    """
+
+    def __init__(self, path: str, prefix: str = "meetsum"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._runs: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self._stages: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._peak_rss = 0
+
+    def emit(self, record: Dict) -> None:
+        with self._lock:
+            r = self._runs[record["run"]]
+            r[0] += 1
+            r[1] += record["wall_s"]
+            for k, v in record["stages"].items():
+                st = self._stages[k]
+                st[0] += v["calls"]
+                st[1] += v["wall_s"]
+            for k, v in record["counts"].items():
+                self._counts[k] += v
+            self._peak_rss = max(self._peak_rss, record["peak_rss_bytes"])
+            self._write()
+
+    def _write(self) -> None:
+        p = self.prefix
+        lines: List[str] = []
+
+        def family(name: str, kind: str, samples) -> None:
+            # Each metric family stays contiguous, TYPE line first
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.extend(f"{p}_{name}{labels} {value}" for labels, value in samples)
+
+        family("runs_total", "counter", ((f'{{run="{k}"}}', v[0]) for k, v in sorted(self._runs.items())))
+        family("run_seconds_total", "counter", ((f'{{run="{k}"}}', f"{v[1]:.6f}") for k, v in sorted(self._runs.items())))
+        family("stage_calls_total", "counter", ((f'{{stage="{k}"}}', v[0]) for k, v in sorted(self._stages.items())))
+        family("stage_seconds_total", "counter", ((f'{{stage="{k}"}}', f"{v[1]:.6f}") for k, v in sorted(self._stages.items())))
+        for name, v in sorted(self._counts.items()):
+            family(f"{name}_total", "counter", [("", v)])
+        family("peak_rss_bytes", "gauge", [("", self._peak_rss)])
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
+
+# ---------------- Switches ----------------
+def enable(*sinks) -> None:
+    """Turns instrumentation on with the given sinks (default: LogSink)."""
+    global _ENABLED
+    _SINKS[:] = list(sinks) or [LogSink()]
+    _ENABLED = True
+
+
+def disable() -> None:
+    global _ENABLED
+    _ENABLED = False
+    _SINKS.clear()
+
+
+def configure_from_env(var: str = "MEETSUM_METRICS") -> None:
+    """Parses e.g. "log,json:/tmp/m.jsonl,prom:/tmp/m.prom" and enables those sinks."""
+    spec = os.environ.get(var, "").strip()
+    if not spec:
+        return
+    sinks = []
+    for part in spec.split(","):
+        kind, _, arg = part.strip().partition(":")
+        if kind == "log":
+            sinks.append(LogSink())
+        elif kind == "json":
+            sinks.append(JsonSink(arg or None))
+        elif kind == "prom" and arg:
+            sinks.append(PrometheusSink(arg))
+        else:
+            raise ValueError(f"Bad {var} entry: {part!r}")
+    enable(*sinks)
+
+
+configure_from_env()
@@ -0,0 +1,253 @@
+# summariser_server.py
+# Long-lived local summarization service around meeting_summariser.
+# Loads and warms the model once at start-up, so the Next.js API routes don't pay
+# model load + a cold first request in every fresh Python process.
+#
+# Usage:
+#   python summariser_server.py --port 8765                       # localhost HTTP
+#   python summariser_server.py --socket /tmp/meetsum.sock        # HTTP over a Unix socket
+#
+# Endpoints (JSON in, JSON out):
+#   POST /summarize  {"text": "..."}                          -> {"summary": "..."}
+#   POST /analyse    {"text": "...", "key_points": 7, "fields": [...]}  -> analyse_meeting report
+#   GET  /metrics    queue depth, batch sizes, per-request latency percentiles
+#   GET  /healthz
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import meeting_summariser as ms
+
+
+class BatchingQueue:
+    """
+    Dynamic batching in front of bart_summaries: concurrent requests are grouped
+    until max_batch texts are waiting or the oldest has waited max_wait_ms, then
+    summarized together in one call.
+    """
+
+    def __init__(self, model_name: str, max_batch: int = 8, max_wait_ms: float = 20.0, backend: str = "torch"):
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=2000)
+        self._batch_sizes: deque = deque(maxlen=2000)
+        self.completed = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._loop, name="batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        self._q.put((text, time.perf_counter(), fut))
+        return fut
+
+    def depth(self) -> int:
+        return self._q.qsize()
+
+    def _loop(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = batch[0][1] + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        try:
+            summaries = ms.bart_summaries(
+                [text for text, _, _ in batch], model_name=self.model_name, backend=self.backend
+            )
+        except Exception as e:
+            for _, _, fut in batch:
+                fut.set_exception(e)
+            with self._lock:
+                self.failed += len(batch)
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self._batch_sizes.append(len(batch))
+            for _, t0, _ in batch:
+                self._latencies.append(now - t0)
+            self.completed += len(batch)
+        for (_, _, fut), s in zip(batch, summaries):
+            fut.set_result(s)
+
+    def metrics(self) -> Dict[str, object]:
+        with self._lock:
+            lat = sorted(self._latencies)
+            sizes = list(self._batch_sizes)
+
+        def pct(q):
+            return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+
+        return {
+            "queue_depth": self.depth(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "latency_ms_p50": pct(0.5),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_p99": pct(0.99),
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else None,
+        }
+
+
+def warm_up(model_name: str, rounds: int = 2, backend: str = "torch") -> float:
+    """Loads the model and runs a few uncached generations. Returns seconds spent."""
+    t0 = time.perf_counter()
+    ms._load_bart(model_name, backend)
+    text = (
+        "Team met to discuss Q4 launch timelines. Priya will finalize UI copy by Oct 22. "
+        "Please create the deployment checklist. Let's prepare the UAT plan this week. "
+        "Backend integration is blocked on API v2 and Rohit will update the schema by Friday. "
+        "We agreed to target a soft launch on Nov 10 pending security review. "
+    ) * 3
+    for _ in range(rounds):
+        ms.bart_summary(text, model_name=model_name, use_cache=False, backend=backend)
+    return time.perf_counter() - t0
+
+
+def make_handler(batcher: BatchingQueue, started: float):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            # client_address is empty for Unix sockets; keep logs short either way
+            print("[summariser] " + fmt % args, flush=True)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send(200, {"ok": True, "model": batcher.model_name, "backend": batcher.backend})
+            elif self.path == "/metrics":
+                m = batcher.metrics()
+                m["uptime_s"] = round(time.time() - started, 1)
+                self._send(200, m)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                req = json.loads(self.rfile.read(length) or b"{}")
+                text = req["text"]
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": f"bad request: {e}"})
+                return
+
+            try:
+                if self.path == "/summarize":
+                    self._send(200, {"summary": self._summary(text)})
+                elif self.path == "/analyse":
+                    self._send(200, self._analyse(text, req))
+                else:
+                    self._send(404, {"error": "not found"})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+
+        def _summary(self, text: str) -> str:
+            return self._wait_summary(self._submit_summary(text))
+
+        def _submit_summary(self, text: str):
+            text = ms.clean_text(text)
+            if not text or len(text.split()) < 40:
+                return text, None
+            return text, batcher.submit(text)
+
+        def _wait_summary(self, pending) -> str:
+            text, fut = pending
+            if fut is None:
+                return text
+            try:
+                return fut.result()
+            except Exception:
+                # Same degradation as short_summary when BART fails
+                return ms.short_summary(text, use_bart=False)
+
+        def _analyse(self, text: str, req: Dict) -> Dict[str, object]:
+            fields: List[str] = req.get("fields") or list(ms.ANALYSIS_FIELDS)
+            # The summary goes through the batching queue while the other stages run here
+            t0 = time.perf_counter()
+            pending = self._submit_summary(text) if "summary" in fields else None
+            rest = [f for f in fields if f != "summary"]
+            report = ms.analyse_meeting(
+                text,
+                key_points=int(req.get("key_points", 7)),
+                use_bart=False,
+                fields=rest,
+                parallel=True,
+            ) if rest else {"timings": {}}
+            if pending is not None:
+                report["summary"] = self._wait_summary(pending)
+                report["timings"]["summary"] = time.perf_counter() - t0
+            return report
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def serve(args) -> None:
+    print(f"[summariser] loading + warming {args.model} ({args.backend}) ...", flush=True)
+    secs = warm_up(args.model, rounds=args.warmup_rounds, backend=args.backend)
+    print(f"[summariser] warm in {secs:.1f}s", flush=True)
+
+    batcher = BatchingQueue(args.model, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, backend=args.backend)
+    handler = make_handler(batcher, time.time())
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = UnixHTTPServer(args.socket, handler)
+        where = args.socket
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        where = f"http://{args.host}:{args.port}"
+    print(f"[summariser] listening on {where}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm local summarization server")
+    parser.add_argument("--model", default="facebook/bart-large-cnn")
+    parser.add_argument("--backend", default="torch", choices=ms.BACKENDS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", default="", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--max_batch", type=int, default=8)
+    parser.add_argument("--max_wait_ms", type=float, default=20.0)
+    parser.add_argument("--warmup_rounds", type=int, default=2)
+    serve(parser.parse_args())
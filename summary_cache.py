@@ -0,0 +1,97 @@
+# summary_cache.py
+# Content-addressed cache for meeting_summariser results.
+# Two tiers: an in-memory LRU and an optional on-disk SQLite file with
+# size-based (least recently used) eviction. Values must be JSON-serializable.
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_key(*parts) -> str:
+    """
+    SHA-256 over the JSON encoding of parts, e.g.
+    make_key("analyse", cleaned_text, model_name, {"key_points": 7}).
+    """
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    get()/set() look in memory first, then on disk. Values are stored as JSON
+    text, so every get() hands back a fresh object that callers may mutate.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_items: int = 256, path: Optional[str] = None, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            raw = self._mem.get(key)
+            if raw is not None:
+                self._mem.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    raw = row[0]
+                    self._db.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, raw)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value) -> None:
+        raw = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, raw)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, raw, len(raw), time.time()),
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def _remember(self, key: str, raw: str) -> None:
+        self._mem[key] = raw
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # Drop least recently used rows until we're back under 90% of the budget
+        target = int(self.max_disk_bytes * 0.9)
+        for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm  # noqa: E402
+
+PAD, EOS = 0, 1
+
+
+def _tiny_t5():
+    torch.manual_seed(0)
+    config = transformers.T5Config(
+        vocab_size=64,
+        d_model=32,
+        d_kv=8,
+        d_ff=64,
+        num_layers=2,
+        num_decoder_layers=2,
+        num_heads=4,
+        dropout_rate=0.0,
+        pad_token_id=PAD,
+        eos_token_id=EOS,
+        decoder_start_token_id=PAD,
+    )
+    return transformers.T5ForConditionalGeneration(config).eval()
+
+
+def _features():
+    g = torch.Generator().manual_seed(1)
+    feats = []
+    for ls, lt in [(9, 4), (5, 3), (3, 6), (7, 2), (2, 2)]:
+        src = torch.randint(2, 64, (ls,), generator=g).tolist() + [EOS]
+        lab = torch.randint(2, 64, (lt,), generator=g).tolist() + [EOS]
+        feats.append({"input_ids": src, "attention_mask": [1] * len(src), "labels": lab})
+    return feats
+
+
+def _padded(feats):
+    ls = max(len(f["input_ids"]) for f in feats)
+    lt = max(len(f["labels"]) for f in feats)
+    return {
+        "input_ids": torch.tensor([f["input_ids"] + [PAD] * (ls - len(f["input_ids"])) for f in feats]),
+        "attention_mask": torch.tensor([f["attention_mask"] + [0] * (ls - len(f["attention_mask"])) for f in feats]),
+        "labels": torch.tensor([f["labels"] + [-100] * (lt - len(f["labels"])) for f in feats]),
+    }
+
+
+def _loss_and_grads(model, batch):
+    model.zero_grad()
+    loss = llm.model_forward(model, batch).loss
+    loss.backward()
+    return loss.detach(), {n: p.grad.clone() for n, p in model.named_parameters() if p.grad is not None}
+
+
+def test_packed_loss_matches_unpacked():
+    model = _tiny_t5()
+    llm.check_packable(model)
+    feats = _features()
+    packed = llm.Seq2SeqPackingCollator(PAD, model.config.decoder_start_token_id, max_len=16, max_target_len=16)(feats)
+    assert packed["input_ids"].size(0) < len(feats)
+    assert llm.batch_sample_count(packed) == len(feats)
+
+    loss_ref, grads_ref = _loss_and_grads(model, _padded(feats))
+    loss_packed, grads_packed = _loss_and_grads(model, packed)
+
+    torch.testing.assert_close(loss_packed, loss_ref, rtol=1e-5, atol=1e-5)
+    assert grads_packed.keys() == grads_ref.keys()
+    for name, grad in grads_ref.items():
+        torch.testing.assert_close(grads_packed[name], grad, rtol=1e-4, atol=1e-5, msg=name)
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm  # noqa: E402
+
+WORKERS, WORLD, BATCH = 3, 2, 2
+
+
+def _shards(tmp_path):
+    paths, n = [], 0
+    for shard, size in enumerate([23, 17]):
+        path = tmp_path / f"shard{shard}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(size):
+                f.write(json.dumps({"transcript": f"t{n}", "summary": "s"}) + "\n")
+                n += 1
+            f.write(json.dumps({"transcript": None, "summary": "s"}) + "\n")  # left out of the index
+        paths.append(str(path))
+    return paths
+
+
+def _dataset(paths, rank):
+    return llm.StreamingInterviewDataset(
+        paths, tokenizer=None, shuffle_buffer=5, batch_size=BATCH, rank=rank, world_size=WORLD, num_workers=WORKERS
+    )
+
+
+def _streams(monkeypatch, ds):
+    # What each DataLoader worker of ds's rank yields
+    monkeypatch.setattr(llm, "tokenize_sample", lambda tokenizer, sample, *args: sample["input"])
+    out = []
+    for w in range(WORKERS):
+        monkeypatch.setattr(llm, "get_worker_info", lambda w=w: SimpleNamespace(id=w, num_workers=WORKERS))
+        out.append(list(ds))
+    return out
+
+
+def _loader_order(streams):
+    # DataLoader order: batch_size records from each worker in turn
+    order, pos = [], [0] * len(streams)
+    while any(p < len(s) for p, s in zip(pos, streams)):
+        for w, s in enumerate(streams):
+            order.extend(s[pos[w] : pos[w] + BATCH])
+            pos[w] += BATCH
+    return order
+
+
+def test_streaming_slots_are_disjoint_and_equal(tmp_path, monkeypatch):
+    paths = _shards(tmp_path)
+    seen = []
+    for rank in range(WORLD):
+        ds = _dataset(paths, rank)
+        ds.set_epoch(1)
+        streams = _streams(monkeypatch, ds)
+        assert len({len(s) for s in streams}) == 1
+        assert all(len(s) % BATCH == 0 for s in streams)
+        assert sum(len(s) for s in streams) == len(ds)
+        seen.extend(r for s in streams for r in s)
+    assert len(seen) == len(set(seen)) == 40 // (WORKERS * WORLD) // BATCH * BATCH * WORKERS * WORLD
+
+
+def test_first_owned_resume_arithmetic(tmp_path):
+    ds = _dataset(_shards(tmp_path), rank=0)
+    assert [ds._first_owned(w, WORKERS, 100) for w in range(WORKERS)] == [100] * WORKERS
+    ds.set_epoch(0, start_sample=7 * BATCH)  # 7 batches: workers 0, 1, 2, 0, 1, 2, 0
+    assert [ds._first_owned(w, WORKERS, 100) - 100 for w in range(WORKERS)] == [3 * BATCH, 2 * BATCH, 2 * BATCH]
+
+
+@pytest.mark.parametrize("batches", [0, 1, 4, 5])
+def test_streaming_resume_continues_the_epoch(tmp_path, monkeypatch, batches):
+    paths = _shards(tmp_path)
+    ds = _dataset(paths, rank=1)
+    ds.set_epoch(2)
+    full = _loader_order(_streams(monkeypatch, ds))
+    ds.set_epoch(2, start_sample=batches * BATCH)
+    rest = [r for s in _streams(monkeypatch, ds) for r in s]
+    consumed = full[: batches * BATCH]
+    assert sorted(consumed + rest) == sorted(full)